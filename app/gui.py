@@ -1,12 +1,21 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 from core.parser import parse_file
-from core import scorer
+from core import scorer, semantic
+from core.optimizer import optimize_sections
+import os
+import queue
 import threading
-from docx import Document
 from tkinter.filedialog import asksaveasfilename
 import re
-from core.rewriter import rewrite_sections_streaming
+from core.pool import rewrite_sections_parallel
+from core.rewriter import MODEL, load_config, segment_resume
+from core.tracing import TRACER, format_summary
+from core.live import LiveScorer
+from app.tasks import POLL_MS, TaskRunner
+
+# Quiet time after the last keystroke before live scores are recomputed
+LIVE_SCORE_DEBOUNCE_MS = 250
 
 
 class ResumeOptimizerGUI:
@@ -16,9 +25,33 @@ class ResumeOptimizerGUI:
         self.root.geometry("1200x800")
         self.root.configure(bg="#f0f0f0")
 
+        # Parsing, scoring and rewriting run on workers; results return via root.after
+        self.tasks = TaskRunner(self.root)
+        self._status_task = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Live scoring: edits are debounced on the Tk thread, scored on a worker
+        self.live_score_enabled = tk.BooleanVar(
+            value=load_config().get("live_score", True)
+        )
+        self._live_score_job = None
+        self._live_requests = queue.Queue()
+        self._live_results = queue.Queue()
+        threading.Thread(target=self._live_score_worker, daemon=True).start()
+
+        # Rewrite mode: one pass, or retry sections below keyword_match_threshold
+        self.optimize_rewrite = tk.BooleanVar(
+            value=load_config().get("optimize_rewrite", False)
+        )
+
         # Configure style
         self.setup_styles()
         self.create_widgets()
+        self.root.after(POLL_MS, self._poll_live_scores)
+
+        # Optionally load the LLM in the background while the user picks files
+        if load_config().get("llm_prewarm", False):
+            MODEL.prewarm()
 
     def setup_styles(self):
         """Setup ttk styles for better appearance"""
@@ -152,6 +185,15 @@ class ResumeOptimizerGUI:
         )
         self.score_label.grid(row=0, column=0, sticky=(tk.W, tk.E))
 
+        ttk.Checkbutton(
+            score_frame,
+            text="⚡ Live score while editing",
+            variable=self.live_score_enabled,
+            command=self.schedule_live_score,
+        ).grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
+        for widget in (self.resume_text, self.job_text):
+            widget.bind("<<Modified>>", self._on_text_modified)
+
         # Action buttons
         action_frame = ttk.Frame(main_frame)
         action_frame.grid(row=3, column=0, columnspan=2, pady=(15, 0))
@@ -172,33 +214,70 @@ class ResumeOptimizerGUI:
             style="Action.TButton",
         ).grid(row=0, column=1, padx=(10, 0), sticky=(tk.W, tk.E))
 
+        ttk.Checkbutton(
+            action_frame,
+            text="🔁 Retry sections below the keyword target",
+            variable=self.optimize_rewrite,
+        ).grid(row=1, column=1, padx=(10, 0), pady=(5, 0), sticky=tk.W)
+
+        # Status bar for background work
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(15, 0))
+        status_frame.grid_columnconfigure(1, weight=1)
+
+        self.progress = ttk.Progressbar(status_frame, mode="determinate", length=200)
+        self.progress.grid(row=0, column=0, padx=(0, 10))
+        self.status_label = ttk.Label(status_frame, text="", background="#f0f0f0")
+        self.status_label.grid(row=0, column=1, sticky=tk.W)
+        self.cancel_button = ttk.Button(
+            status_frame,
+            text="⏹️ Cancel",
+            command=self.cancel_status_task,
+            state=tk.DISABLED,
+        )
+        self.cancel_button.grid(row=0, column=2, padx=(10, 0))
+
     def upload_resume(self):
-        file_path = filedialog.askopenfilename(
-            title="Select Resume File",
-            filetypes=[("Document Files", "*.pdf *.docx *.txt"), ("All Files", "*.*")],
+        self._upload_into(
+            self.resume_text, "Select Resume File", "Resume uploaded successfully!", "resume"
         )
-        if file_path:
-            try:
-                content = parse_file(file_path)
-                self.resume_text.delete(1.0, tk.END)
-                self.resume_text.insert(tk.END, content)
-                messagebox.showinfo("Success", "Resume uploaded successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to parse resume:\n{e}")
 
     def upload_job(self):
+        self._upload_into(
+            self.job_text,
+            "Select Job Description File",
+            "Job description uploaded successfully!",
+            "job description",
+        )
+
+    def _upload_into(self, text_widget, title, success_message, noun):
         file_path = filedialog.askopenfilename(
-            title="Select Job Description File",
+            title=title,
             filetypes=[("Document Files", "*.pdf *.docx *.txt"), ("All Files", "*.*")],
         )
-        if file_path:
-            try:
-                content = parse_file(file_path)
-                self.job_text.delete(1.0, tk.END)
-                self.job_text.insert(tk.END, content)
-                messagebox.showinfo("Success", "Job description uploaded successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to parse job description:\n{e}")
+        if not file_path:
+            return
+        name = os.path.basename(file_path)
+
+        def loaded(content):
+            self._finish_status(task, f"Loaded {name}")
+            text_widget.delete(1.0, tk.END)
+            text_widget.insert(tk.END, content)
+            messagebox.showinfo("Success", success_message)
+
+        def failed(error):
+            self._finish_status(task, "")
+            messagebox.showerror("Error", f"Failed to parse {noun}:\n{error}")
+
+        task = self.tasks.submit(
+            f"parse {name}",
+            _parse_task,
+            file_path,
+            on_done=loaded,
+            on_error=failed,
+            on_cancel=lambda: self._finish_status(task, "Cancelled"),
+        )
+        self._start_status(task, f"📄 Parsing {name}...")
 
     def score_resume(self):
         resume = self.resume_text.get("1.0", tk.END)
@@ -210,24 +289,125 @@ class ResumeOptimizerGUI:
             )
             return
 
-        try:
-            # Show loading message
-            self.score_label.config(text="🔄 Calculating scores...")
-            self.root.update()
+        def scored(final_scores):
+            self._finish_status(task, "")
+            self.show_scores(final_scores)
 
-            raw_scores = scorer.get_score(resume, jd)
-            final_scores = scorer.calculate_final_score(raw_scores)
+        def failed(error):
+            self._finish_status(task, "")
+            messagebox.showerror("Scoring Error", f"Failed to calculate scores:\n{error}")
+            self.score_label.config(text="❌ Error calculating scores")
 
-            display = (
-                f"✅ Keyword Match: {final_scores['keyword_match']}%    "
-                f"🧩 Section Match: {final_scores['section_match']}%\n"
-                f"📈 Keyword Density: {final_scores['keyword_density']}%    "
-                f"💯 Overall Score: {final_scores['overall_score']}%"
+        # Show loading message
+        self.score_label.config(text="🔄 Calculating scores...")
+        task = self.tasks.submit(
+            "score",
+            _score_task,
+            resume,
+            jd,
+            on_done=scored,
+            on_error=failed,
+            on_cancel=lambda: self._finish_status(task, "Cancelled"),
+        )
+        self._start_status(task, "🎯 Scoring...")
+
+    # Status bar: progress of the most recent background task
+    def _start_status(self, task, message):
+        self._status_task = task
+        self.status_label.config(text=message)
+        self.progress.stop()
+        self.progress.configure(mode="indeterminate", value=0)
+        self.progress.start(15)
+        self.cancel_button.config(state=tk.NORMAL)
+
+    def _finish_status(self, task, message):
+        if task is not self._status_task:
+            return
+        self._status_task = None
+        self.progress.stop()
+        self.progress.configure(mode="determinate", value=0)
+        self.status_label.config(text=message)
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def cancel_status_task(self):
+        if self._status_task is not None:
+            self._status_task.cancel()
+            self.status_label.config(text="Cancelling...")
+
+    def on_close(self):
+        # Stop generation and parsing so the process exits promptly
+        self.tasks.shutdown()
+        self.root.destroy()
+
+    def show_scores(self, final_scores, live=False):
+        display = (
+            f"✅ Keyword Match: {final_scores['keyword_match']}%    "
+            f"🧩 Section Match: {final_scores['section_match']}%\n"
+            f"📈 Keyword Density: {final_scores['keyword_density']}%    "
+            f"💯 Overall Score: {final_scores['overall_score']}%"
+        )
+        if semantic.SEMANTIC_METRIC in final_scores:
+            display += f"\n🧠 Semantic Match: {final_scores[semantic.SEMANTIC_METRIC]}%"
+        if live:
+            display += "    ⚡"
+        self.score_label.config(text=display)
+
+    def _on_text_modified(self, event):
+        # <<Modified>> fires once until the flag is reset
+        event.widget.edit_modified(False)
+        self.schedule_live_score()
+
+    def schedule_live_score(self):
+        """Restart the debounce timer; scores update once typing pauses"""
+        if self._live_score_job is not None:
+            self.root.after_cancel(self._live_score_job)
+            self._live_score_job = None
+        if self.live_score_enabled.get():
+            self._live_score_job = self.root.after(
+                LIVE_SCORE_DEBOUNCE_MS, self._request_live_score
             )
-            self.score_label.config(text=display)
-        except Exception as e:
-            messagebox.showerror("Scoring Error", f"Failed to calculate scores:\n{e}")
-            self.score_label.config(text="❌ Error calculating scores")
+
+    def _request_live_score(self):
+        self._live_score_job = None
+        resume = self.resume_text.get("1.0", tk.END)
+        jd = self.job_text.get("1.0", tk.END)
+        if resume.strip() and jd.strip():
+            self._live_requests.put((resume, jd))
+
+    def _live_score_worker(self):
+        live = LiveScorer()
+        while True:
+            resume, jd = self._live_requests.get()
+            # Only the newest texts matter when edits arrive faster than scoring
+            while True:
+                try:
+                    resume, jd = self._live_requests.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                raw_scores = live.update(resume, jd)
+                self._live_results.put(
+                    semantic.final_scores(raw_scores, resume, live.profile)
+                )
+            except Exception as e:
+                # Start from a clean state; the error is reported on the Tk thread
+                live = LiveScorer()
+                self._live_results.put(e)
+
+    def _poll_live_scores(self):
+        final_scores = None
+        while True:
+            try:
+                result = self._live_results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, Exception):
+                self.root.report_callback_exception(type(result), result, result.__traceback__)
+            else:
+                final_scores = result
+        if final_scores is not None and self.live_score_enabled.get():
+            self.show_scores(final_scores, live=True)
+        self.root.after(POLL_MS, self._poll_live_scores)
 
     def rewrite_resume(self):
         resume = self.resume_text.get("1.0", tk.END)
@@ -239,27 +419,8 @@ class ResumeOptimizerGUI:
             )
             return
 
-        # Show processing message
-        processing_dialog = tk.Toplevel(self.root)
-        processing_dialog.title("Processing")
-        processing_dialog.geometry("300x100")
-        processing_dialog.configure(bg="#f0f0f0")
-        tk.Label(
-            processing_dialog,
-            text="🔄 Rewriting resume...",
-            font=("Arial", 12),
-            bg="#f0f0f0",
-        ).pack(expand=True)
-        processing_dialog.transient(self.root)
-        processing_dialog.grab_set()
-
-        def close_processing():
-            processing_dialog.destroy()
-
-        threading.Thread(
-            target=lambda: [self.launch_rewrite_window(resume, jd), close_processing()],
-            daemon=True,
-        ).start()
+        # Widgets are built here on the Tk thread; only generation runs on a worker
+        self.launch_rewrite_window(resume, jd)
 
     def copy_all_to_clipboard(self, text_widget):
         text = text_widget.get("1.0", tk.END)
@@ -278,6 +439,8 @@ class ResumeOptimizerGUI:
         )
         if filename:
             try:
+                from docx import Document
+
                 doc = Document()
                 for line in clean_text.strip().split("\n"):
                     if line.strip():
@@ -340,36 +503,144 @@ class ResumeOptimizerGUI:
             ),
         ).pack(side=tk.LEFT)
 
-        def worker():
-            def stream_update(section, rewritten):
-                rewritten_text_widget.insert(
-                    tk.END, f"## {section.capitalize()}\n{rewritten}\n\n"
-                )
-                rewritten_text_widget.see(tk.END)
-                rewritten_text_widget.update_idletasks()
-
-            try:
-                for section, rewritten in rewrite_sections_streaming(resume, jd):
-                    if section == "Error":
-
-                        def update_error():
-                            rewritten_text_widget.delete("1.0", tk.END)
-                            rewritten_text_widget.insert(tk.END, f"⚠️ {rewritten}")
-
-                        self.root.after(0, update_error)
-                        return
+        # Optional per-stage timings for this rewrite
+        trace_mark = TRACER.mark()
+        timings_widget = tk.Text(
+            main_frame,
+            height=12,
+            wrap=tk.NONE,
+            font=("Consolas", 9),
+            bg="#fafafa",
+            relief="solid",
+            borderwidth=1,
+        )
 
-                    # Call GUI updates from main thread
-                    self.root.after(0, stream_update, section, rewritten)
+        def refresh_timings():
+            timings_widget.configure(state=tk.NORMAL)
+            timings_widget.delete("1.0", tk.END)
+            timings_widget.insert(tk.END, format_summary(TRACER.spans(since=trace_mark)))
+            timings_widget.configure(state=tk.DISABLED)
 
-            except Exception as e:
+        def toggle_timings():
+            if timings_widget.winfo_ismapped():
+                timings_widget.pack_forget()
+            else:
+                refresh_timings()
+                timings_widget.pack(fill=tk.X, pady=(0, 15), before=button_frame)
 
-                def update_exception():
+        ttk.Button(
+            button_frame, text="⏱️ Timings", command=toggle_timings
+        ).pack(side=tk.RIGHT)
+
+        stop_button = ttk.Button(button_frame, text="⏹️ Stop")
+        stop_button.pack(side=tk.RIGHT, padx=(10, 0))
+
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill=tk.X, pady=(0, 10), before=button_frame)
+        progress = ttk.Progressbar(status_frame, mode="determinate", length=240)
+        progress.pack(side=tk.LEFT)
+        status_label = ttk.Label(status_frame, text="Starting...")
+        status_label.pack(side=tk.LEFT, padx=(10, 0))
+
+        def show(events):
+            pending = []
+            for action, text in events:
+                if action == "replace":
+                    pending = []
                     rewritten_text_widget.delete("1.0", tk.END)
-                    rewritten_text_widget.insert(
-                        tk.END, f"⚠️ Error rewriting resume:\n{str(e)}"
-                    )
+                pending.append(text)
+            if pending:
+                rewritten_text_widget.insert(tk.END, "".join(pending))
+                rewritten_text_widget.see(tk.END)
 
-                self.root.after(0, update_exception)
+        def update_progress(done, total, message):
+            if total:
+                progress.configure(maximum=total, value=done)
+            if message:
+                status_label.config(text=message)
+
+        def finish(message):
+            stop_button.config(state=tk.DISABLED)
+            status_label.config(text=message)
+            if timings_widget.winfo_ismapped():
+                refresh_timings()
+
+        def failed(error):
+            show([("replace", f"⚠️ Error rewriting resume:\n{error}")])
+            finish("Failed")
+
+        task = self.tasks.submit(
+            "rewrite",
+            _rewrite_task,
+            resume,
+            jd,
+            self.optimize_rewrite.get(),
+            on_events=show,
+            on_progress=update_progress,
+            on_done=lambda _: finish("✅ Done"),
+            on_error=failed,
+            on_cancel=lambda: finish("⏹️ Stopped"),
+        )
 
-        threading.Thread(target=worker, daemon=True).start()
+        def stop():
+            task.cancel()
+            stop_button.config(state=tk.DISABLED)
+            status_label.config(text="Stopping...")
+
+        def close():
+            # Closing the window abandons the rewrite and frees the model
+            task.cancel()
+            rewrite_window.destroy()
+
+        stop_button.config(command=stop)
+        rewrite_window.protocol("WM_DELETE_WINDOW", close)
+
+
+def _parse_task(task, file_path):
+    return parse_file(file_path)
+
+
+def _score_task(task, resume, jd):
+    raw_scores = scorer.get_score(resume, jd)
+    return semantic.final_scores(raw_scores, resume, jd)
+
+
+def _rewrite_task(task, resume, jd, optimize=False):
+    """Stream rewrite events to the window; cancelling closes the generator, which stops decoding"""
+    total = sum(1 for text in segment_resume(resume).values() if text.strip())
+    done = 0
+    task.progress(done, total, "Rewriting...")
+    if optimize:
+        events = optimize_sections(resume, jd)
+    else:
+        events = rewrite_sections_parallel(resume, jd)
+    final = []
+    try:
+        for event, section, text in events:
+            task.check()
+            if event == "error":
+                task.emit(("replace", f"⚠️ {text}"))
+                return
+            if event == "start":
+                task.emit(("append", f"## {section.capitalize()}\n"))
+                task.progress(done, total, f"Rewriting {section} ({done + 1}/{total})...")
+            elif event == "token":
+                task.emit(("append", text))
+            elif event == "truncated":
+                task.emit(("append", f"\n⚠️ {text}"))
+            elif event == "end":
+                task.emit(("append", "\n\n"))
+                done += 1
+                task.progress(done, total, None)
+            elif event == "round":
+                retry = text.split(", ")
+                done, total = 0, len(retry)
+                task.emit(("append", f"🔁 Below the keyword target, retrying: {text}\n\n"))
+                task.progress(done, total, "Retrying weak sections...")
+            elif event == "final":
+                final.append(f"## {section.capitalize()}\n{text}\n\n")
+        if final:
+            # Replace the pass-by-pass log with the best version of each section
+            task.emit(("replace", "".join(final)))
+    finally:
+        events.close()
@@ -0,0 +1,148 @@
+import queue
+import sys
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+# How often worker results are delivered to the Tk thread
+POLL_MS = 50
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task function that noticed it was cancelled"""
+
+
+class Task:
+    """Handle for one background job
+
+    The task function receives the Task as its first argument. It should
+    check `cancelled` (or call check()) between steps, report progress()
+    and may emit() payloads that are handed to on_events on the Tk thread.
+    """
+
+    def __init__(self, runner, name, on_done, on_error, on_progress, on_events, on_cancel):
+        self.name = name
+        self._runner = runner
+        self._cancel = threading.Event()
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_events = on_events
+        self.on_cancel = on_cancel
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def progress(self, done=None, total=None, message=None):
+        """Report progress; only the latest report per poll reaches the UI"""
+        self._runner._post(self, "progress", (done, total, message))
+
+    def emit(self, payload):
+        """Queue a payload for on_events; payloads are delivered in batches, in order"""
+        self._runner._post(self, "event", payload)
+
+
+class TaskRunner:
+    """Runs GUI work on worker threads and calls back on the Tk thread
+
+    Tk widgets may only be touched from the thread running mainloop, so
+    workers never call back directly: everything goes through one queue that
+    the Tk thread drains every POLL_MS with root.after.
+    """
+
+    def __init__(self, root, workers=2):
+        self.root = root
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="gui-task"
+        )
+        self._messages = queue.Queue()
+        self.active = set()
+        self.root.after(POLL_MS, self._poll)
+
+    def submit(
+        self,
+        name,
+        func,
+        *args,
+        on_done=None,
+        on_error=None,
+        on_progress=None,
+        on_events=None,
+        on_cancel=None,
+    ) -> Task:
+        """Run func(task, *args) on a worker; callbacks run on the Tk thread"""
+        task = Task(self, name, on_done, on_error, on_progress, on_events, on_cancel)
+        self.active.add(task)
+        self._executor.submit(self._run, task, func, args)
+        return task
+
+    def _run(self, task, func, args):
+        try:
+            result = func(task, *args)
+        except TaskCancelled:
+            self._post(task, "cancelled", None)
+        except Exception as e:
+            self._post(task, "error", e)
+        else:
+            self._post(task, "cancelled" if task.cancelled else "done", result)
+
+    def _post(self, task, kind, payload):
+        self._messages.put((task, kind, payload))
+
+    def _poll(self):
+        events = {}
+        progress = {}
+        finished = []
+        while True:
+            try:
+                task, kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "event":
+                events.setdefault(task, []).append(payload)
+            elif kind == "progress":
+                progress[task] = payload
+            else:
+                finished.append((task, kind, payload))
+
+        for task, batch in events.items():
+            self._call(task.on_events, batch)
+        for task, (done, total, message) in progress.items():
+            self._call(task.on_progress, done, total, message)
+        for task, kind, payload in finished:
+            self.active.discard(task)
+            if kind == "done":
+                self._call(task.on_done, payload)
+            elif kind == "error":
+                self._call(task.on_error, payload)
+            else:
+                self._call(task.on_cancel)
+        self.root.after(POLL_MS, self._poll)
+
+    def _call(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except tk.TclError:
+            # A callback for a window that has since closed; keep polling
+            pass
+        except Exception:
+            # A real bug: report it the way Tk reports callback errors, and keep polling
+            self.root.report_callback_exception(*sys.exc_info())
+
+    def cancel_all(self):
+        for task in list(self.active):
+            task.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,143 @@
+import random
+
+SKILLS = [
+    "python", "java", "javascript", "typescript", "golang", "rust", "c++", "c#",
+    "sql", "postgresql", "mysql", "mongodb", "redis", "kafka", "spark", "hadoop",
+    "airflow", "dbt", "docker", "kubernetes", "terraform", "ansible", "aws", "azure",
+    "gcp", "react", "angular", "django", "flask", "fastapi", "graphql", "grpc",
+    "pytorch", "tensorflow", "pandas", "numpy", "tableau", "linux", "git", "jenkins",
+]
+VERBS = [
+    "Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Launched",
+    "Scaled", "Refactored", "Mentored", "Implemented", "Reduced", "Improved",
+]
+OBJECTS = [
+    "data pipelines", "microservices", "CI/CD workflows", "customer dashboards",
+    "search infrastructure", "billing platform", "recommendation engine",
+    "internal tooling", "observability stack", "mobile backend", "ETL jobs",
+]
+OUTCOMES = [
+    "cutting latency by {n}%", "saving ${n}k per year", "serving {n}M requests a day",
+    "reducing incidents by {n}%", "for a team of {n} engineers", "ahead of schedule",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+TITLES = ["Software Engineer", "Data Engineer", "Backend Developer", "Platform Engineer"]
+BOILERPLATE = [
+    "We offer competitive salary, dental and vision insurance, and a 401(k) match.",
+    "Unlimited PTO, paid holidays and a yearly wellness budget.",
+    "We are an equal opportunity employer and value diversity of race, religion and gender.",
+    "Reasonable accommodation is available for candidates with a disability.",
+]
+
+
+def _bullet(rng):
+    skills = ", ".join(rng.sample(SKILLS, 2))
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 90))
+    return f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {skills}, {outcome}."
+
+
+def make_resume(rng: random.Random, roles: int = 3, bullets: int = 5) -> str:
+    """Synthetic resume; size grows with the number of roles and bullets per role"""
+    lines = [
+        "Jane Candidate",
+        "jane@example.com | https://github.com/jane",
+        "",
+        "Professional Summary",
+        f"{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience in "
+        f"{', '.join(rng.sample(SKILLS, 4))}.",
+        "",
+        "Work Experience",
+    ]
+    year = 2024
+    for _ in range(roles):
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)}   {start} - {year}")
+        lines.extend(_bullet(rng) for _ in range(bullets))
+        lines.append("")
+        year = start
+    lines += [
+        "Technical Skills",
+        ", ".join(rng.sample(SKILLS, min(len(SKILLS), 8 + roles))),
+        "",
+        "Education",
+        "BSc Computer Science, State University",
+        "",
+        "Projects",
+    ]
+    lines.extend(_bullet(rng) for _ in range(max(2, roles)))
+    return "\n".join(lines)
+
+
+def make_jd(rng: random.Random, requirements: int = 8) -> str:
+    """Synthetic job description with requirement bullets and benefits boilerplate"""
+    title = rng.choice(TITLES)
+    lines = [
+        f"Senior {title}",
+        f"{rng.choice(COMPANIES)} is hiring a senior {title.lower()} to join our platform team.",
+        "Responsibilities:",
+    ]
+    lines.extend(_bullet(rng) for _ in range(max(2, requirements // 2)))
+    lines.append("Requirements:")
+    for _ in range(requirements):
+        skill = rng.choice(SKILLS)
+        lines.append(
+            f"- {rng.randint(2, 8)}+ years of experience with {skill} and "
+            f"{rng.choice(OBJECTS)}."
+        )
+    lines.append("Benefits:")
+    lines.extend(rng.sample(BOILERPLATE, len(BOILERPLATE)))
+    return "\n".join(lines)
+
+
+# Named corpus sizes: (roles, bullets per role, JD requirements)
+SIZES = {
+    "small": (2, 3, 6),
+    "medium": (4, 6, 12),
+    "large": (10, 10, 30),
+}
+
+
+def make_pair(size: str, seed: int = 0):
+    """Deterministic (resume, jd) pair for a named size"""
+    roles, bullets, requirements = SIZES[size]
+    rng = random.Random(f"{seed}:{size}")
+    return make_resume(rng, roles, bullets), make_jd(rng, requirements)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, text: str, lines_per_page: int = 45):
+    """Write text as a plain multi-page PDF (Helvetica, one text object per page)"""
+    lines = text.encode("latin-1", "replace").decode("latin-1").split("\n")
+    pages = [lines[i : i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = ["<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", None]
+    kids = []
+    for page in pages:
+        body = " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page)
+        stream = f"BT /F1 10 Tf 50 760 Td 14 TL {body} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 1 0 R >> >> >>"
+        )
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root {len(objects)} 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
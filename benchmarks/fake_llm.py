@@ -0,0 +1,105 @@
+import hashlib
+import time
+
+from core import rewriter
+
+
+class FakeLlama:
+    """Deterministic offline stand-in for llama_cpp.Llama
+
+    Implements the subset the rewriter uses. The "rewrite" echoes the section
+    text word by word with a deterministic prefix, so runs are comparable
+    across commits. `token_delay` simulates decode time per token.
+    """
+
+    def __init__(self, n_ctx=4096, token_delay=0.0):
+        self._n_ctx = n_ctx
+        self.token_delay = token_delay
+        self.cache = None
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def tokenize(self, text, add_bos=False, special=False):
+        return text.split()
+
+    def detokenize(self, tokens):
+        return b" ".join(tokens)
+
+    def set_cache(self, cache):
+        self.cache = cache
+
+    def close(self):
+        pass
+
+    def _reply(self, messages, max_tokens, stop):
+        prompt = "\n".join(message["content"] for message in messages)
+        self.calls += 1
+        self.prompt_tokens += len(prompt.split())
+        section = messages[-2]["content"].split("\n\n", 1)[-1]
+        tag = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        words = [f"[{tag}]"] + section.split()
+        words = words[:max_tokens]
+        text = " ".join(words)
+        for marker in stop or []:
+            if marker in text:
+                text = text[: text.index(marker)]
+                words = text.split()
+                break
+        return words
+
+    def create_chat_completion(self, messages, max_tokens=500, stream=False, stop=None, **kwargs):
+        words = self._reply(messages, max_tokens, stop)
+        finish_reason = "length" if len(words) >= max_tokens else "stop"
+        self.completion_tokens += len(words)
+        if not stream:
+            if self.token_delay:
+                time.sleep(self.token_delay * len(words))
+            return {
+                "choices": [
+                    {"message": {"content": " ".join(words)}, "finish_reason": finish_reason}
+                ]
+            }
+
+        def chunks():
+            for i, word in enumerate(words):
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+                yield {
+                    "choices": [
+                        {"delta": {"content": (" " if i else "") + word}, "finish_reason": None}
+                    ]
+                }
+            yield {"choices": [{"delta": {}, "finish_reason": finish_reason}]}
+
+        return chunks()
+
+
+class FakeModelManager(rewriter.ModelManager):
+    """ModelManager that hands out a FakeLlama instead of loading a GGUF file"""
+
+    def __init__(self, **fake_kwargs):
+        super().__init__(model_path="fake-model.gguf", idle_timeout=0)
+        self._fake_kwargs = fake_kwargs
+
+    def _load(self):
+        return FakeLlama(**self._fake_kwargs)
+
+
+class use_fake_llm:
+    """Context manager that swaps rewriter.MODEL for a FakeModelManager"""
+
+    def __init__(self, **fake_kwargs):
+        self.manager = FakeModelManager(**fake_kwargs)
+
+    def __enter__(self):
+        self._previous = rewriter.MODEL
+        rewriter.MODEL = self.manager
+        return self.manager
+
+    def __exit__(self, *exc):
+        rewriter.MODEL = self._previous
+        return False
@@ -0,0 +1,197 @@
+"""Benchmark suite: python -m benchmarks.run [--sizes small medium large] [--output results.json]
+
+Runs timing and memory benchmarks over a deterministic synthetic corpus and
+an offline fake LLM, and writes JSON that can be compared across commits
+with --compare.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from docx import Document
+
+from benchmarks.corpus import SIZES, make_pair, write_pdf
+from benchmarks.fake_llm import use_fake_llm
+from core import parser, rewriter, scorer
+
+
+def measure(func, repeats, warmup=1):
+    """Wall-clock timings in ms plus the tracemalloc peak of one extra run"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "repeats": repeats,
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _write_documents(directory, size, resume):
+    paths = {}
+    paths["txt"] = os.path.join(directory, f"{size}.txt")
+    with open(paths["txt"], "w", encoding="utf-8") as f:
+        f.write(resume)
+
+    paths["docx"] = os.path.join(directory, f"{size}.docx")
+    doc = Document()
+    for line in resume.split("\n"):
+        doc.add_paragraph(line)
+    doc.save(paths["docx"])
+
+    paths["pdf"] = os.path.join(directory, f"{size}.pdf")
+    write_pdf(paths["pdf"], resume)
+    return paths
+
+
+def benchmarks_for(size, resume, jd, workdir):
+    """(name, callable, repeat scale) for one corpus size"""
+    paths = _write_documents(workdir, size, resume)
+    profile = scorer.build_jd_profile(jd)
+
+    def rewrite_end_to_end():
+        with use_fake_llm():
+            for _ in rewriter.rewrite_sections_streaming(
+                resume, jd, use_cache=False, jd_mode="digest"
+            ):
+                pass
+
+    return [
+        ("parser.parse_file[txt]", lambda: parser.parse_file(paths["txt"], use_cache=False), 1),
+        ("parser.parse_file[docx]", lambda: parser.parse_file(paths["docx"], use_cache=False), 1),
+        (
+            "parser.parse_file[pdf]",
+            lambda: parser.parse_file(paths["pdf"], use_cache=False, pdf_workers=1),
+            0.2,
+        ),
+        ("parser.parse_file[cached]", lambda: parser.parse_file(paths["pdf"]), 1),
+        ("scorer.tokenize", lambda: scorer.tokenize(resume), 5),
+        ("scorer.extract_keywords", lambda: scorer.extract_keywords(jd), 5),
+        ("scorer.keyword_match", lambda: scorer.keyword_match(resume, jd), 2),
+        ("scorer.get_score", lambda: scorer.get_score(resume, jd), 2),
+        ("scorer.score_resume[profile]", lambda: scorer.score_resume(resume, profile), 2),
+        ("rewriter.segment_resume", lambda: rewriter.segment_resume(resume), 5),
+        ("rewriter.rewrite_sections_streaming[fake]", rewrite_end_to_end, 0.5),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeats, seed, only=None):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep benchmark caches away from the user's real caches
+        parser._parse_cache = parser.DiskCache(os.path.join(workdir, "parsed.sqlite"))
+        for size in sizes:
+            resume, jd = make_pair(size, seed)
+            for name, func, scale in benchmarks_for(size, resume, jd, workdir):
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                stats = measure(func, max(3, int(repeats * scale)))
+                results.append({"name": name, "size": size, **stats})
+                print(
+                    f"{name:45s} {size:7s} median {stats['median_ms']:10.3f} ms"
+                    f"   peak {stats['peak_kib']:9.1f} KiB",
+                    file=sys.stderr,
+                )
+        parser._parse_cache = None
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "sizes": {size: SIZES[size] for size in sizes},
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print median deltas against a baseline run; return the regressions"""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["name"], result["size"]))
+        if not before or not before["median_ms"]:
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(
+            f"{result['name']:45s} {result['size']:7s} "
+            f"{before['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms "
+            f"({change:+.1%}) {flag}",
+            file=sys.stderr,
+        )
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    arg_parser.add_argument("--repeats", type=int, default=20)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--only", nargs="+", help="Run benchmarks whose name contains any of these")
+    arg_parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    arg_parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative median slowdown reported as a regression (default 0.2 = 20%%)",
+    )
+    args = arg_parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeats, args.seed, args.only)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Start-up benchmark: python -m benchmarks.startup [--modules app.gui cli] [--output startup.json]
+
+Imports each entry module in fresh interpreters with -X importtime and
+reports the median wall time of the import plus the most expensive modules
+it pulled in. Results use the benchmarks.run format, so --compare works
+against an earlier run.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+from benchmarks.run import compare, git_commit
+
+DEFAULT_MODULES = ["app.gui", "cli", "server", "core.scorer", "core.parser", "core.rewriter"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints the wall time of one import in ms; -X importtime writes per-module timings to stderr
+_PROBE = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def import_once(module):
+    """(wall ms, {imported module: cumulative µs}) for one cold interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module or "sys")],
+        capture_output=True,
+        text=True,
+        cwd=REPO_ROOT,
+        check=True,
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        cumulative = cumulative.strip()
+        if cumulative.isdigit():
+            modules[name.strip()] = int(cumulative)
+    return float(completed.stdout.strip().splitlines()[-1]), modules
+
+
+def measure_import(module, repeats):
+    walls = []
+    per_module = {}
+    for _ in range(repeats):
+        wall, modules = import_once(module)
+        walls.append(wall)
+        for name, micros in modules.items():
+            per_module.setdefault(name, []).append(micros)
+    return walls, {name: statistics.median(values) for name, values in per_module.items()}
+
+
+def run(modules, repeats, top):
+    # Modules the interpreter loads before any of ours (site, .pth hooks) are not ours to fix
+    _, interpreter = import_once(None)
+    results = []
+    for module in modules:
+        walls, per_module = measure_import(module, repeats)
+        heaviest = sorted(
+            (
+                (name, micros)
+                for name, micros in per_module.items()
+                if name != module and name not in interpreter
+            ),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:top]
+        results.append(
+            {
+                "name": f"startup.import[{module}]",
+                "size": "-",
+                "repeats": repeats,
+                "min_ms": round(min(walls), 4),
+                "median_ms": round(statistics.median(walls), 4),
+                "mean_ms": round(statistics.fmean(walls), 4),
+                "modules_ms": {name: round(micros / 1000, 3) for name, micros in heaviest},
+            }
+        )
+        print(f"{module:20s} median {statistics.median(walls):8.1f} ms", file=sys.stderr)
+        for name, micros in heaviest:
+            print(f"    {name:40s} {micros / 1000:8.1f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=10, help="Heaviest imports listed per module")
+    arg_parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    arg_parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative median slowdown reported as a regression (default 0.2 = 20%%)",
+    )
+    args = arg_parser.parse_args(argv)
+
+    results = run(args.modules, args.repeats, args.top)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Tuple
+
+from core import autotune, keyphrases
+from core.config import CONFIG_PATH, load_config, update_config
+from core.index import ResumeIndex
+from core.parser import parse_file
+from core import scorer, semantic
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+RESULT_FIELDS = [
+    "resume",
+    "jd",
+    "keyword_match",
+    "section_match",
+    "keyword_density",
+    "overall_score",
+]
+
+# Per-worker state, built once by the pool initializer
+_WORKER_PROFILES: List[Tuple[str, scorer.JDProfile]] = []
+_WORKER_SEMANTIC_WEIGHT = 0.0
+
+
+def list_documents(directory: str) -> List[str]:
+    """Return supported document paths in a directory, sorted by name"""
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and name.lower().endswith(SUPPORTED_EXTENSIONS):
+            paths.append(path)
+    return paths
+
+
+def _parse_document(path: str, max_pages: int = None) -> Tuple[str, str, str]:
+    try:
+        # Files are already spread over processes, so extract each PDF serially
+        return path, parse_file(path, max_pages=max_pages, pdf_workers=1), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def _init_worker(jds: List[Tuple[str, str]], semantic_weight: float = 0.0):
+    global _WORKER_PROFILES, _WORKER_SEMANTIC_WEIGHT
+    _WORKER_PROFILES = [(name, scorer.build_jd_profile(text)) for name, text in jds]
+    _WORKER_SEMANTIC_WEIGHT = semantic_weight
+
+
+def _score_resume_file(
+    path: str, max_pages: int = None
+) -> Tuple[str, List[Dict[str, float]], str]:
+    """Parse one resume and score it against every JD profile of this worker"""
+    try:
+        text = parse_file(path, max_pages=max_pages, pdf_workers=1)
+    except Exception as e:
+        return path, [], str(e)
+
+    profiles = [profile for _, profile in _WORKER_PROFILES]
+    raw_scores = scorer.score_against_many(text, profiles)
+    weights = None
+    if _WORKER_SEMANTIC_WEIGHT:
+        # The resume is run through spaCy once; JD keyword vectors stay cached in the worker
+        similarities = semantic.SEMANTIC.similarity_against_many(text, profiles)
+        for scores, similarity in zip(raw_scores, similarities):
+            scores[semantic.SEMANTIC_METRIC] = similarity
+        weights = semantic.score_weights(_WORKER_SEMANTIC_WEIGHT)
+    results = []
+    for (jd_name, _), scores in zip(_WORKER_PROFILES, raw_scores):
+        final_scores = scorer.calculate_final_score(scores, weights)
+        results.append({"resume": os.path.basename(path), "jd": jd_name, **final_scores})
+    return path, results, None
+
+
+def score_directories(
+    resume_dir: str,
+    jd_dir: str,
+    workers: int = None,
+    max_pages: int = None,
+    semantic_weight: float = 0.0,
+) -> Iterator[Dict[str, float]]:
+    """Yield score rows for every resume x JD pair as resumes finish scoring"""
+    workers = workers or os.cpu_count() or 1
+    jd_paths = list_documents(jd_dir)
+    resume_paths = list_documents(resume_dir)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = list(
+            pool.map(_parse_document, jd_paths, [max_pages] * len(jd_paths))
+        )
+
+    jds = []
+    for path, text, error in parsed:
+        if error:
+            print(f"Skipping job description {path}: {error}", file=sys.stderr)
+            continue
+        jds.append((os.path.basename(path), text))
+    if not jds or not resume_paths:
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(jds, semantic_weight)
+    ) as pool:
+        # Keep a bounded number of resumes in flight so huge folders stream
+        pending = set()
+        paths = iter(resume_paths)
+        for path in paths:
+            pending.add(pool.submit(_score_resume_file, path, max_pages))
+            if len(pending) < workers * 4:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _collect(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _collect(done)
+
+
+def _collect(futures) -> Iterator[Dict[str, float]]:
+    for future in futures:
+        path, results, error = future.result()
+        if error:
+            print(f"Skipping resume {path}: {error}", file=sys.stderr)
+            continue
+        yield from results
+
+
+def _rank_key(row: Dict[str, float]):
+    # Ties break on the resume name, as ResumeIndex.top_k breaks on doc_id,
+    # so the ranking does not depend on the order worker results arrive in
+    return (-row["overall_score"], row["resume"])
+
+
+def top_k_per_jd(rows: Iterator[Dict[str, float]], k: int) -> Iterator[Dict[str, float]]:
+    """Keep only the k best resumes for each JD, ranked by overall score"""
+    kept: Dict[str, list] = {}
+    for row in rows:
+        best = kept.setdefault(row["jd"], [])
+        best.append(row)
+        # Trim in batches so memory stays within 2k rows per JD
+        if len(best) >= 2 * k:
+            best[:] = heapq.nsmallest(k, best, key=_rank_key)
+
+    for jd_name in sorted(kept):
+        ranked = heapq.nsmallest(k, kept[jd_name], key=_rank_key)
+        for rank, row in enumerate(ranked, start=1):
+            yield {**row, "rank": rank}
+
+
+def write_rows(rows: Iterator[Dict[str, float]], out, fmt: str, fields: List[str]):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            out.flush()
+    else:
+        for row in rows:
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+
+
+def cmd_score(args):
+    semantic_weight = args.semantic_weight
+    if semantic_weight is None:
+        semantic_weight = semantic.semantic_weight()
+    fields = list(RESULT_FIELDS)
+    if semantic_weight:
+        try:
+            semantic.SEMANTIC.check_model()
+        except RuntimeError as e:
+            sys.exit(str(e))
+        fields.insert(fields.index("overall_score"), semantic.SEMANTIC_METRIC)
+
+    rows = score_directories(
+        args.resumes,
+        args.jds,
+        workers=args.workers,
+        max_pages=args.max_pages,
+        semantic_weight=semantic_weight,
+    )
+    if args.top_k:
+        rows = top_k_per_jd(rows, args.top_k)
+        fields.append("rank")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_rows(rows, out, args.format, fields)
+    else:
+        write_rows(rows, sys.stdout, args.format, fields)
+
+
+def cmd_index(args):
+    """Add new and changed resumes in a folder to the index; --prune drops deleted ones"""
+    index = ResumeIndex(args.index)
+    paths = list_documents(args.resumes)
+    workers = args.workers or os.cpu_count() or 1
+    changed = failed = 0
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = pool.map(
+            _parse_document, paths, [args.max_pages] * len(paths), chunksize=16
+        )
+        for path, text, error in parsed:
+            if error:
+                print(f"Skipping resume {path}: {error}", file=sys.stderr)
+                failed += 1
+                continue
+            batch.append((os.path.basename(path), text))
+            if len(batch) >= 256:
+                changed += index.add_many(batch)
+                batch = []
+    changed += index.add_many(batch)
+
+    removed = 0
+    if args.prune:
+        present = {os.path.basename(path) for path in paths}
+        for doc_id in index.doc_ids():
+            if doc_id not in present:
+                removed += index.remove(doc_id)
+
+    print(
+        f"Indexed {changed} new or changed resumes, removed {removed}, "
+        f"skipped {failed}; {len(index)} in {args.index}",
+        file=sys.stderr,
+    )
+    index.close()
+
+
+def cmd_top(args):
+    index = ResumeIndex(args.index)
+    jd_name = os.path.basename(args.jd)
+    rows = [
+        {"resume": row.pop("resume"), "jd": jd_name, **row, "rank": rank}
+        for rank, row in enumerate(
+            index.top_k(parse_file(args.jd, max_pages=args.max_pages), args.top_k), start=1
+        )
+    ]
+    index.close()
+
+    fields = RESULT_FIELDS + ["rank"]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_rows(rows, out, args.format, fields)
+    else:
+        write_rows(rows, sys.stdout, args.format, fields)
+
+
+def cmd_autotune(args):
+    """Benchmark llama.cpp settings with the configured model and store the fastest"""
+
+    def report(run):
+        print(
+            f"threads={run['n_threads']:>3} batch_threads={run['n_threads_batch']:>3} "
+            f"n_batch={run['n_batch']:>5}  prompt {run['prompt_tokens_per_s']:>9.1f} tok/s  "
+            f"decode {run['decode_tokens_per_s']:>7.1f} tok/s",
+            file=sys.stderr,
+        )
+
+    try:
+        result = autotune.autotune(
+            model_path=args.model,
+            threads=args.threads,
+            batch_sizes=args.batch_sizes,
+            n_ctx=args.n_ctx,
+            n_gpu_layers=args.gpu_layers,
+            prompt_tokens=args.prompt_tokens,
+            decode_tokens=args.decode_tokens,
+            repeats=args.repeats,
+            report=report,
+        )
+    except ImportError:
+        sys.exit("autotune needs llama-cpp-python: pip install llama-cpp-python")
+
+    settings = result["settings"]
+    print(json.dumps(settings, indent=2))
+    if args.dry_run:
+        return
+    update_config(settings, args.config)
+    print(f"Saved to {args.config}", file=sys.stderr)
+
+
+def cmd_idf(args):
+    """Build the keyphrase IDF table from a folder of job postings"""
+    paths = list_documents(args.corpus)
+    workers = args.workers or os.cpu_count() or 1
+    failed = 0
+
+    def documents(pool):
+        nonlocal failed
+        parsed = pool.map(_parse_document, paths, [args.max_pages] * len(paths), chunksize=16)
+        for path, text, error in parsed:
+            if error:
+                print(f"Skipping posting {path}: {error}", file=sys.stderr)
+                failed += 1
+                continue
+            yield text
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stats = keyphrases.build_idf_table(documents(pool), args.output, min_df=args.min_df)
+    print(
+        f"Wrote {stats['ngrams']} n-grams from {stats['documents']} postings "
+        f"(skipped {failed}) to {args.output}",
+        file=sys.stderr,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="LLM Resume Optimizer command line")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score = subparsers.add_parser(
+        "score", help="Score every resume in a folder against every job description"
+    )
+    score.add_argument("--resumes", required=True, help="Folder of resumes (pdf/docx/txt)")
+    score.add_argument("--jds", required=True, help="Folder of job descriptions")
+    score.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all cores)"
+    )
+    score.add_argument(
+        "--max-pages", type=int, default=None, help="Only read the first N pages of PDFs"
+    )
+    score.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    score.add_argument("--output", help="Output file (default: stdout)")
+    score.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        help="Only report the best K resumes per job description",
+    )
+    score.add_argument(
+        "--semantic-weight",
+        type=float,
+        default=None,
+        help="Weight of the spaCy semantic match in the overall score "
+        "(default: semantic_weight from config.yaml, 0 disables)",
+    )
+    score.set_defaults(func=cmd_score)
+
+    default_index = load_config().get("resume_index_path", ".cache/resumes.sqlite")
+
+    index = subparsers.add_parser(
+        "index", help="Add a folder of resumes to the persistent resume index"
+    )
+    index.add_argument("--resumes", required=True, help="Folder of resumes (pdf/docx/txt)")
+    index.add_argument("--index", default=default_index, help="Index file")
+    index.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all cores)"
+    )
+    index.add_argument(
+        "--max-pages", type=int, default=None, help="Only read the first N pages of PDFs"
+    )
+    index.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove indexed resumes that are no longer in the folder",
+    )
+    index.set_defaults(func=cmd_index)
+
+    top = subparsers.add_parser(
+        "top", help="Rank the indexed resumes against one job description"
+    )
+    top.add_argument("--jd", required=True, help="Job description file")
+    top.add_argument("--index", default=default_index, help="Index file")
+    top.add_argument("--top-k", type=int, default=10, help="How many resumes to return")
+    top.add_argument(
+        "--max-pages", type=int, default=None, help="Only read the first N pages of PDFs"
+    )
+    top.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    top.add_argument("--output", help="Output file (default: stdout)")
+    top.set_defaults(func=cmd_top)
+
+    tune = subparsers.add_parser(
+        "autotune",
+        help="Measure llama.cpp thread and batch settings on this machine and save the fastest",
+    )
+    tune.add_argument("--model", help="GGUF model (default: llm_model_path)")
+    tune.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        help="Thread counts to try (default: powers of two, half and all CPUs)",
+    )
+    tune.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        help=f"n_batch values to try (default: {' '.join(map(str, autotune.DEFAULT_BATCH_SIZES))})",
+    )
+    tune.add_argument("--n-ctx", type=int, help="Context size to save (default: llm_n_ctx)")
+    tune.add_argument(
+        "--gpu-layers", type=int, help="Layers to offload while measuring (default: llm_n_gpu_layers)"
+    )
+    tune.add_argument("--prompt-tokens", type=int, default=autotune.DEFAULT_PROMPT_TOKENS)
+    tune.add_argument("--decode-tokens", type=int, default=autotune.DEFAULT_DECODE_TOKENS)
+    tune.add_argument("--repeats", type=int, default=autotune.DEFAULT_REPEATS)
+    tune.add_argument("--config", default=CONFIG_PATH, help="Config file to update")
+    tune.add_argument(
+        "--dry-run", action="store_true", help="Print the best settings without saving them"
+    )
+    tune.set_defaults(func=cmd_autotune)
+
+    idf = subparsers.add_parser(
+        "idf", help="Build the IDF table for keyphrase extraction from a folder of job postings"
+    )
+    idf.add_argument("--corpus", required=True, help="Folder of job postings (pdf/docx/txt)")
+    idf.add_argument(
+        "--output",
+        default=load_config().get("idf_table_path", keyphrases.DEFAULT_IDF_TABLE_PATH),
+        help="Table file (default: idf_table_path)",
+    )
+    idf.add_argument(
+        "--min-df",
+        type=int,
+        default=2,
+        help="Leave out n-grams found in fewer postings (they get the unseen IDF)",
+    )
+    idf.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all cores)"
+    )
+    idf.add_argument(
+        "--max-pages", type=int, default=None, help="Only read the first N pages of PDFs"
+    )
+    idf.set_defaults(func=cmd_idf)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.func(args)
@@ -0,0 +1,179 @@
+import os
+import time
+from typing import Callable, Dict, List
+
+from core import rewriter
+
+DEFAULT_BATCH_SIZES = (64, 128, 256, 512, 1024)
+DEFAULT_PROMPT_TOKENS = 512  # about one section plus a JD digest
+DEFAULT_DECODE_TOKENS = 64
+DEFAULT_REPEATS = 2
+# Fewer threads win when they come within this fraction of the fastest run,
+# leaving cores to the GUI, parsing and scoring
+TIE_TOLERANCE = 0.03
+
+_SAMPLE_SENTENCE = (
+    "Led a team of engineers building data pipelines in Python and SQL, "
+    "cut report latency by 40% and mentored new hires on testing and code review."
+)
+
+
+def candidate_threads(cpus: int = None) -> List[int]:
+    """Powers of two up to the CPU count, plus half and all of the logical CPUs"""
+    cpus = cpus or os.cpu_count() or 1
+    threads = {cpus, max(1, cpus // 2)}
+    count = 1
+    while count < cpus:
+        threads.add(count)
+        count *= 2
+    return sorted(threads)
+
+
+def sample_messages(llm, prompt_tokens: int):
+    """A rewrite prompt of roughly prompt_tokens tokens, built like real section prompts"""
+    sentences = [_SAMPLE_SENTENCE]
+    # Two thirds section, one third JD
+    while rewriter.count_tokens(llm, " ".join(sentences)) < prompt_tokens * 2 // 3:
+        sentences.append(_SAMPLE_SENTENCE)
+    section = "\n".join(f"- {sentence}" for sentence in sentences)
+    jd = " ".join(sentences[: max(1, len(sentences) // 2)])
+    return rewriter.build_messages("experience", section, jd)
+
+
+def measure(llm, messages, decode_tokens: int, repeats: int) -> Dict[str, float]:
+    """Best prompt-eval and decode tokens/s over `repeats` streamed completions
+
+    Time to the first token is prompt evaluation; the tokens after it are
+    decode. The model's evaluated tokens are reset before each run so the
+    prompt is evaluated in full every time.
+    """
+    prompt_tokens = sum(rewriter.count_tokens(llm, m["content"]) for m in messages)
+    best = {"prompt_tokens_per_s": 0.0, "decode_tokens_per_s": 0.0}
+    for _ in range(repeats):
+        reset = getattr(llm, "reset", None)
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        first_token_at = None
+        completion_tokens = 0
+        for chunk in llm.create_chat_completion(
+            messages, max_tokens=decode_tokens, temperature=0, stream=True
+        ):
+            if "content" not in chunk["choices"][0]["delta"]:
+                continue
+            completion_tokens += 1
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+        end = time.perf_counter()
+        if first_token_at is None:
+            continue
+        best["prompt_tokens_per_s"] = max(
+            best["prompt_tokens_per_s"], prompt_tokens / max(first_token_at - start, 1e-9)
+        )
+        if completion_tokens > 1:
+            best["decode_tokens_per_s"] = max(
+                best["decode_tokens_per_s"],
+                (completion_tokens - 1) / max(end - first_token_at, 1e-9),
+            )
+    return {key: round(value, 2) for key, value in best.items()}
+
+
+def _pick(results: List[Dict], setting: str, metric: str):
+    """Smallest setting within TIE_TOLERANCE of the best value of metric"""
+    fastest = max(result[metric] for result in results)
+    for result in sorted(results, key=lambda r: r[setting]):
+        if result[metric] >= fastest * (1 - TIE_TOLERANCE):
+            return result[setting]
+
+
+def _default_factory(model_path: str, **settings):
+    from llama_cpp import Llama
+
+    return Llama(model_path=model_path, verbose=False, **settings)
+
+
+def autotune(
+    model_path: str = None,
+    threads: List[int] = None,
+    batch_sizes: List[int] = None,
+    n_ctx: int = None,
+    n_gpu_layers: int = None,
+    prompt_tokens: int = DEFAULT_PROMPT_TOKENS,
+    decode_tokens: int = DEFAULT_DECODE_TOKENS,
+    repeats: int = DEFAULT_REPEATS,
+    factory: Callable = None,
+    report: Callable = None,
+) -> Dict:
+    """Benchmark llama.cpp settings on this machine and return the best ones
+
+    Decode is memory-bandwidth bound and prompt evaluation compute bound, so
+    they are tuned separately: every thread count is run once, decode picks
+    n_threads and prompt evaluation picks n_threads_batch; batch sizes are
+    then compared at that prompt thread count. n_ctx is capped at the
+    context the model was trained with. Each setting loads the model afresh
+    (llama.cpp fixes threads and batch size at load time); the GGUF stays
+    in the page cache, so reloads after the first are quick.
+    """
+    factory = factory or _default_factory
+    base = rewriter.llama_settings()
+    model_path = model_path or rewriter.MODEL.model_path
+    n_ctx = n_ctx or base["n_ctx"]
+    if n_gpu_layers is None:
+        n_gpu_layers = base["n_gpu_layers"]
+    threads = threads or candidate_threads()
+    batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+    report = report or (lambda result: None)
+
+    def run(n_threads, n_threads_batch, n_batch):
+        llm = factory(
+            model_path,
+            n_ctx=n_ctx,
+            n_gpu_layers=n_gpu_layers,
+            n_threads=n_threads,
+            n_threads_batch=n_threads_batch,
+            n_batch=n_batch,
+        )
+        try:
+            messages = sample_messages(llm, prompt_tokens)
+            result = {
+                "n_threads": n_threads,
+                "n_threads_batch": n_threads_batch,
+                "n_batch": n_batch,
+            }
+            result.update(measure(llm, messages, decode_tokens, repeats))
+            n_ctx_train = getattr(llm, "n_ctx_train", None)
+            if n_ctx_train is not None:
+                result["n_ctx_train"] = n_ctx_train()
+        finally:
+            close = getattr(llm, "close", None)
+            if close is not None:
+                close()
+        report(result)
+        return result
+
+    default_batch = 512 if 512 in batch_sizes else max(batch_sizes)
+    thread_runs = [run(count, count, default_batch) for count in threads]
+    n_threads = _pick(thread_runs, "n_threads", "decode_tokens_per_s")
+    n_threads_batch = _pick(thread_runs, "n_threads_batch", "prompt_tokens_per_s")
+
+    batch_runs = [
+        run(n_threads, n_threads_batch, size) for size in batch_sizes if size != default_batch
+    ]
+    # The thread sweep already measured the default batch size at this prompt thread count
+    reference = next(r for r in thread_runs if r["n_threads_batch"] == n_threads_batch)
+    n_batch = _pick(batch_runs + [reference], "n_batch", "prompt_tokens_per_s")
+
+    n_ctx_train = thread_runs[0].get("n_ctx_train")
+    if n_ctx_train:
+        n_ctx = min(n_ctx, n_ctx_train)
+
+    return {
+        "settings": {
+            "llm_n_ctx": n_ctx,
+            "llm_n_threads": n_threads,
+            "llm_n_threads_batch": n_threads_batch,
+            "llm_n_batch": n_batch,
+            "llm_n_gpu_layers": n_gpu_layers,
+        },
+        "runs": thread_runs + batch_runs,
+    }
@@ -0,0 +1,43 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+import yaml
+
+CONFIG_PATH = "config.yaml"
+# A top-level "key: value" line and its trailing comment; quoted values may contain "#"
+_KEY_LINE_RE = re.compile(r'^([A-Za-z_]\w*):\s*(?:"[^"]*"|[^#"]*?)(\s+#.*)?$')
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Read config.yaml once, on first use; a missing file means all defaults"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def update_config(values: dict, path: str = CONFIG_PATH):
+    """Set top-level keys in config.yaml in place, keeping comments and key order
+
+    Keys that are not in the file yet are appended. Values are written as
+    JSON scalars, which YAML reads back unchanged. The cached config is
+    dropped so the next load_config sees the new values.
+    """
+    lines = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            lines = f.read().splitlines()
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        match = _KEY_LINE_RE.match(line)
+        if match and match.group(1) in remaining:
+            key = match.group(1)
+            lines[i] = f"{key}: {json.dumps(remaining.pop(key))}{match.group(2) or ''}"
+    for key, value in remaining.items():
+        lines.append(f"{key}: {json.dumps(value)}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    load_config.cache_clear()
@@ -0,0 +1,362 @@
+import heapq
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from core import scorer
+from core.cache import content_hash
+
+# Bump when tokenization, section detection or the stored statistics change;
+# older files are rebuilt
+INDEX_VERSION = "2"
+BATCH_SIZE = 500  # ids per IN (...) query
+
+
+def _char_mask(token: str) -> int:
+    mask = 0
+    for char in token:
+        mask |= 1 << (ord(char) % 63)
+    return mask
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+def _could_match(query: str, query_mask: int, token: str, token_mask: int, bound: float) -> bool:
+    """Cheap upper bound on fuzz.ratio before paying for the real thing
+
+    fuzz.ratio is 2*M/T with M at most the shorter length and at most the
+    query length minus one per distinct query character the token lacks.
+    Colliding mask bits only loosen the bound, never tighten it.
+    """
+    total = len(query) + len(token)
+    needed = bound * total / 200
+    if min(len(query), len(token)) < needed:
+        return False
+    missing = _popcount(query_mask & ~token_mask)
+    return len(query) - missing >= needed
+
+
+class ResumeIndex:
+    """On-disk inverted index over a resume corpus for top-k ranking against a job description
+
+    Each resume is tokenized once with scorer.tokenize. The index stores
+    token -> (resume, count) postings, the per-resume token count and section
+    match, and the corpus vocabulary. For each JD keyword seen so far it also
+    keeps the vocabulary tokens within the fuzzy threshold, updated as
+    resumes come and go. top_k() reads only the postings of the JD's keywords
+    and their fuzzy neighbours, and its scores equal scorer.get_score.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        self._fuzzy_keywords = None
+
+    def _create_schema(self):
+        conn = self._conn
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is not None and row[0] != INDEX_VERSION:
+            for table in ("resumes", "postings", "vocab", "fuzzy_keywords", "fuzzy_neighbors"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS resumes ("
+            "id INTEGER PRIMARY KEY, doc_id TEXT UNIQUE NOT NULL, digest TEXT NOT NULL, "
+            "token_count INTEGER NOT NULL, section_match REAL NOT NULL, "
+            "vocabulary TEXT NOT NULL)"
+        )
+        # Serves the ranked scan in top_k in order, ties broken by doc_id as a full scan does
+        conn.execute("DROP INDEX IF EXISTS resumes_section_match")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS resumes_rank ON resumes (section_match DESC, doc_id)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "token TEXT NOT NULL, resume INTEGER NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (token, resume)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS vocab ("
+            "token TEXT PRIMARY KEY, df INTEGER NOT NULL, "
+            "length INTEGER NOT NULL, mask INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS vocab_length ON vocab (length)")
+        conn.execute("CREATE TABLE IF NOT EXISTS fuzzy_keywords (keyword TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fuzzy_neighbors ("
+            "keyword TEXT NOT NULL, token TEXT NOT NULL, "
+            "PRIMARY KEY (keyword, token)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS fuzzy_neighbors_token ON fuzzy_neighbors (token)"
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (INDEX_VERSION,)
+        )
+        conn.commit()
+
+    # Maintenance
+    def add(self, doc_id: str, text: str) -> bool:
+        """Index (or re-index) one resume; returns False if it was already indexed unchanged"""
+        return self.add_many([(doc_id, text)]) == 1
+
+    def add_many(self, documents: Iterable[Tuple[str, str]]) -> int:
+        """Index many resumes in one transaction; returns how many were new or changed"""
+        changed = 0
+        with self._lock:
+            try:
+                for doc_id, text in documents:
+                    changed += self._add(doc_id, text)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return changed
+
+    def _add(self, doc_id, text):
+        digest = content_hash(text)
+        row = self._conn.execute(
+            "SELECT digest FROM resumes WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        if row is not None:
+            if row[0] == digest:
+                return 0
+            self._remove(doc_id)
+
+        resume = scorer.TokenizedText(text)
+        section_match = scorer._section_percentage(resume.sections, scorer.SCORED_SECTIONS)
+        cursor = self._conn.execute(
+            "INSERT INTO resumes (doc_id, digest, token_count, section_match, vocabulary) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (doc_id, digest, resume.token_count, section_match, " ".join(resume.counts)),
+        )
+        resume_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT INTO postings (token, resume, count) VALUES (?, ?, ?)",
+            [(token, resume_id, count) for token, count in resume.counts.items()],
+        )
+        for token in resume.counts:
+            updated = self._conn.execute(
+                "UPDATE vocab SET df = df + 1 WHERE token = ?", (token,)
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT INTO vocab (token, df, length, mask) VALUES (?, 1, ?, ?)",
+                    (token, len(token), _char_mask(token)),
+                )
+                self._link_new_token(token)
+        return 1
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            removed = self._remove(doc_id)
+            self._conn.commit()
+        return removed
+
+    def _remove(self, doc_id):
+        row = self._conn.execute(
+            "SELECT id, vocabulary FROM resumes WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        resume_id, vocabulary = row
+        tokens = vocabulary.split()
+        self._conn.executemany(
+            "DELETE FROM postings WHERE token = ? AND resume = ?",
+            [(token, resume_id) for token in tokens],
+        )
+        self._conn.executemany(
+            "UPDATE vocab SET df = df - 1 WHERE token = ?", [(token,) for token in tokens]
+        )
+        gone = [
+            (token,)
+            for token in tokens
+            if self._conn.execute(
+                "SELECT df FROM vocab WHERE token = ?", (token,)
+            ).fetchone()[0] <= 0
+        ]
+        self._conn.executemany("DELETE FROM vocab WHERE token = ?", gone)
+        self._conn.executemany("DELETE FROM fuzzy_neighbors WHERE token = ?", gone)
+        self._conn.execute("DELETE FROM resumes WHERE id = ?", (resume_id,))
+        return True
+
+    # Fuzzy vocabulary
+    def _known_keywords(self) -> Dict[str, int]:
+        if self._fuzzy_keywords is None:
+            self._fuzzy_keywords = {
+                keyword: _char_mask(keyword)
+                for (keyword,) in self._conn.execute("SELECT keyword FROM fuzzy_keywords")
+            }
+        return self._fuzzy_keywords
+
+    def _link_new_token(self, token):
+        """Record a brand-new vocabulary token as a neighbour of every known keyword it is close to"""
+        bound = scorer.PARTIAL_MATCH_THRESHOLD - 0.5
+        token_mask = _char_mask(token)
+        ratio = scorer.fuzz_ratio()
+        for keyword, keyword_mask in self._known_keywords().items():
+            if _could_match(keyword, keyword_mask, token, token_mask, bound) and (
+                ratio(keyword, token) >= scorer.PARTIAL_MATCH_THRESHOLD
+            ):
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO fuzzy_neighbors (keyword, token) VALUES (?, ?)",
+                    (keyword, token),
+                )
+
+    def _neighbors(self, keyword: str) -> List[str]:
+        """Vocabulary tokens within the fuzzy threshold of a keyword, scanning the vocabulary once per new keyword"""
+        known = self._known_keywords()
+        if keyword not in known:
+            bound = scorer.PARTIAL_MATCH_THRESHOLD - 0.5
+            keyword_mask = _char_mask(keyword)
+            length = len(keyword)
+            shortest = max(1, int(length * bound / (200 - bound)))
+            longest = int(length * (200 - bound) / bound) + 1
+            ratio = scorer.fuzz_ratio()
+            matches = [
+                (keyword, token)
+                for token, mask in self._conn.execute(
+                    "SELECT token, mask FROM vocab WHERE length BETWEEN ? AND ?",
+                    (shortest, longest),
+                )
+                if _could_match(keyword, keyword_mask, token, mask, bound)
+                and ratio(keyword, token) >= scorer.PARTIAL_MATCH_THRESHOLD
+            ]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO fuzzy_neighbors (keyword, token) VALUES (?, ?)", matches
+            )
+            self._conn.execute("INSERT INTO fuzzy_keywords (keyword) VALUES (?)", (keyword,))
+            self._conn.commit()
+            known[keyword] = keyword_mask
+        return [
+            token
+            for (token,) in self._conn.execute(
+                "SELECT token FROM fuzzy_neighbors WHERE keyword = ?", (keyword,)
+            )
+        ]
+
+    def _postings(self, token: str) -> List[int]:
+        return [
+            resume
+            for (resume,) in self._conn.execute(
+                "SELECT resume FROM postings WHERE token = ?", (token,)
+            )
+        ]
+
+    # Queries
+    def top_k(self, jd, k: int = 10) -> List[Dict[str, float]]:
+        """Best k resumes for a job description (text or JDProfile), best first"""
+        profile = jd if isinstance(jd, scorer.JDProfile) else None
+        # Postings hold single tokens, so the index always ranks on token keywords
+        if profile is None or profile.keyword_mode != "tokens":
+            text = jd if profile is None else profile.jd_text
+            profile = scorer.build_jd_profile(text, keyword_mode="tokens")
+        keywords = profile.keywords
+        with self._lock:
+            exact: Dict[int, int] = {}
+            partial: Dict[int, float] = {}
+            for keyword in keywords:
+                hits = set(self._postings(keyword))
+                for resume in hits:
+                    exact[resume] = exact.get(resume, 0) + 1
+                near = set()
+                for token in self._neighbors(keyword):
+                    if token != keyword:
+                        near.update(self._postings(token))
+                for resume in near - hits:
+                    partial[resume] = partial.get(resume, 0) + 0.5
+
+            candidates = set(exact) | set(partial)
+            rows = {}
+            ids = list(candidates)
+            for start in range(0, len(ids), BATCH_SIZE):
+                batch = ids[start : start + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                for row in self._conn.execute(
+                    "SELECT id, doc_id, token_count, section_match FROM resumes "
+                    f"WHERE id IN ({placeholders})",
+                    batch,
+                ):
+                    rows[row[0]] = row[1:]
+
+            results = []
+            for resume, (doc_id, token_count, section_match) in rows.items():
+                results.append(
+                    self._score(
+                        profile, doc_id, token_count, section_match,
+                        exact.get(resume, 0), partial.get(resume, 0),
+                    )
+                )
+
+            # Resumes sharing no keyword score on sections alone; only the best k can matter
+            others = []
+            for resume, doc_id, token_count, section_match in self._conn.execute(
+                "SELECT id, doc_id, token_count, section_match FROM resumes "
+                "ORDER BY section_match DESC, doc_id"
+            ):
+                if resume in candidates:
+                    continue
+                others.append(self._score(profile, doc_id, token_count, section_match, 0, 0))
+                if len(others) >= k:
+                    break
+
+        return heapq.nsmallest(
+            k, results + others, key=lambda row: (-row["overall_score"], row["resume"])
+        )
+
+    @staticmethod
+    def _score(profile, doc_id, token_count, section_match, exact, partial):
+        """Scores as scorer.get_score computes them, from the hit counts gathered above"""
+        keyword_count = len(profile.keywords)
+        if token_count > 0 and keyword_count:
+            keyword_density = scorer._keyword_density_value(exact, token_count)
+        else:
+            keyword_density = 0
+        scores = {
+            "keyword_match": scorer._keyword_match_value(exact, partial, keyword_count),
+            "section_match": section_match,
+            "keyword_density": keyword_density,
+            "overall_score": 0,
+        }
+        return {"resume": doc_id, **scorer.calculate_final_score(scores)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM resumes WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return row is not None
+
+    def doc_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT doc_id FROM resumes")]
+
+    def stats(self) -> Dict[str, int]:
+        tables = {
+            "resumes": "resumes",
+            "postings": "postings",
+            "vocabulary": "vocab",
+            "fuzzy_keywords": "fuzzy_keywords",
+        }
+        with self._lock:
+            return {
+                name: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for name, table in tables.items()
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
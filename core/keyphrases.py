@@ -0,0 +1,205 @@
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core import scorer
+from core.config import load_config
+
+DEFAULT_IDF_TABLE_PATH = "data/idf.bin"
+MAX_NGRAM = 3
+MIN_PHRASE_COUNT = 2  # multi-word phrases must repeat in the text to count
+
+# Binary IDF table: a header, then an open-addressing hash table of
+# (64-bit n-gram hash, float32 idf) slots. Slot count is a power of two and
+# at most half full, so a lookup is one hash and a probe or two, read
+# straight from the memory-mapped file.
+_MAGIC = b"KPID"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIf")  # magic, version, max n, documents, slots, unseen idf
+_SLOT = struct.Struct("<Qf")
+
+# Phrase boundaries: sentence punctuation followed by a space, brackets, bullets, newlines.
+# "node.js", "c++" and "ci/cd" stay whole, as scorer.tokenize keeps them.
+_BOUNDARY_RE = re.compile(r"[.,;:!?](?=\s|$)|[()\[\]|\n•●▪]")
+_URL_RE = re.compile(r"http\S+|www\S+")
+
+
+def _is_content(token: str) -> bool:
+    """Tokens that may start or end a keyphrase, the same filter as token keywords"""
+    return len(token) >= 3 and token not in scorer.COMMON_WORDS and not token.isdigit()
+
+
+def candidate_ngrams(text: str) -> Iterator[str]:
+    """Uni-, bi- and trigrams in one pass, never crossing a phrase boundary
+
+    N-grams must start and end with a content token; the middle word of a
+    trigram may be anything but a number ("bachelor of science").
+    """
+    for segment in _BOUNDARY_RE.split(_URL_RE.sub(" ", text)):
+        tokens = scorer.tokenize(segment)
+        content = [_is_content(token) for token in tokens]
+        for i, token in enumerate(tokens):
+            if not content[i]:
+                continue
+            yield token
+            if i >= 1 and content[i - 1]:
+                yield f"{tokens[i - 1]} {token}"
+            if i >= 2 and content[i - 2] and not tokens[i - 1].isdigit():
+                yield f"{tokens[i - 2]} {tokens[i - 1]} {token}"
+
+
+def ngram_hash(ngram: str) -> int:
+    """Stable 64-bit key of an n-gram (0 marks an empty slot, so it is never used)"""
+    digest = hashlib.blake2b(ngram.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class IDFTable:
+    """Read-only view of a binary IDF table, memory-mapped so every process shares the pages"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_n, self.documents, self._slots, self.unseen_idf = (
+            _HEADER.unpack_from(self._map, 0)
+        )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} IDF table")
+        if len(self._map) != _HEADER.size + self._slots * _SLOT.size:
+            raise ValueError(f"{path} is truncated")
+        self._mask = self._slots - 1
+
+    def get(self, ngram: str) -> Optional[float]:
+        """IDF of an n-gram, or None if the background corpus did not have it"""
+        key = ngram_hash(ngram)
+        slot = key & self._mask
+        while True:
+            stored, idf = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+            if stored == key:
+                return idf
+            if stored == 0:
+                return None
+            slot = (slot + 1) & self._mask
+
+    def idf(self, ngram: str) -> float:
+        found = self.get(ngram)
+        return self.unseen_idf if found is None else found
+
+    def close(self):
+        self._map.close()
+
+
+def _smoothed_idf(documents: int, df: int) -> float:
+    return math.log((1 + documents) / (1 + df)) + 1
+
+
+def write_idf_table(document_frequencies: Dict[str, int], documents: int, path: str):
+    """Write n-gram document frequencies as a binary IDF table"""
+    slots = 1
+    while slots < 2 * max(len(document_frequencies), 1):
+        slots *= 2
+    table = bytearray(_HEADER.size + slots * _SLOT.size)
+    _HEADER.pack_into(
+        table, 0, _MAGIC, _VERSION, MAX_NGRAM, documents, slots, _smoothed_idf(documents, 0)
+    )
+    mask = slots - 1
+    for ngram, df in document_frequencies.items():
+        key = ngram_hash(ngram)
+        slot = key & mask
+        while struct.unpack_from("<Q", table, _HEADER.size + slot * _SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        _SLOT.pack_into(table, _HEADER.size + slot * _SLOT.size, key, _smoothed_idf(documents, df))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Replace atomically so processes that have the old file mapped keep a valid view
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(table)
+    os.replace(tmp_path, path)
+
+
+def build_idf_table(documents: Iterable[str], path: str, min_df: int = 2) -> Dict[str, int]:
+    """Count in how many documents each candidate n-gram occurs and write the table
+
+    N-grams seen in fewer than min_df documents are left out; they get the
+    table's unseen IDF. Returns {"documents": ..., "ngrams": ...}.
+    """
+    df = Counter()
+    count = 0
+    for text in documents:
+        df.update(set(candidate_ngrams(text)))
+        count += 1
+    kept = {ngram: n for ngram, n in df.items() if n >= min_df}
+    write_idf_table(kept, count, path)
+    return {"documents": count, "ngrams": len(kept)}
+
+
+_tables: Dict[str, tuple] = {}
+_tables_lock = threading.Lock()
+
+
+def load_idf_table(path: str = None) -> Optional[IDFTable]:
+    """The IDF table at path (default: idf_table_path in config.yaml), or None if there is none
+
+    Tables are opened once per process and reopened when the file changes.
+    """
+    path = path or load_config().get("idf_table_path", DEFAULT_IDF_TABLE_PATH)
+    if not path or not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached is None or cached[0] != mtime:
+            _tables[path] = (mtime, IDFTable(path))
+        return _tables[path][1]
+
+
+def _contains(phrase: str, part: str) -> bool:
+    return f" {part} " in f" {phrase} "
+
+
+def extract_keyphrases(text: str, top_n: int = 30, table: IDFTable = None) -> List[str]:
+    """Rank uni/bi/trigram keyphrases of a text by TF-IDF
+
+    IDF comes from the background table (load_idf_table); without one every
+    n-gram weighs the same and ranking is by frequency. Multi-word phrases
+    need MIN_PHRASE_COUNT occurrences; rare phrases score high IDF, so one-off
+    word runs would otherwise crowd out the real ones.
+    Equal weights favour longer n-grams, then first occurrence. An n-gram
+    that never occurs apart from an already selected one (a part inside a
+    phrase, or a phrase around a part) is skipped.
+    """
+    if table is None:
+        table = load_idf_table()
+    counts = Counter(candidate_ngrams(text))
+
+    weighted = []
+    for ngram, count in counts.items():
+        if " " in ngram and count < MIN_PHRASE_COUNT:
+            continue
+        idf = table.idf(ngram) if table is not None else 1.0
+        weighted.append((-count * idf, -ngram.count(" "), ngram))
+    weighted.sort(key=lambda item: item[:2])
+
+    selected: List[str] = []
+    for _, _, ngram in weighted:
+        if len(selected) >= top_n:
+            break
+        count = counts[ngram]
+        if any(
+            (_contains(chosen, ngram) and count <= counts[chosen])
+            or (_contains(ngram, chosen) and count == counts[chosen])
+            for chosen in selected
+        ):
+            continue
+        selected.append(ngram)
+    return selected
@@ -0,0 +1,162 @@
+from collections import Counter, OrderedDict
+from typing import Dict, List
+
+from core import scorer
+from core.sections import header_name
+
+LINE_CACHE_SIZE = 8192  # tokenized lines remembered across edits
+
+
+def _changed_range(old: List[str], new: List[str]):
+    """Trim the common prefix and suffix: old[start:old_end] became new[start:new_end]"""
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+
+def _is_partial_match(keyword: str, token: str) -> bool:
+    # fuzz.ratio can't exceed 200 * shorter / total, so skip hopeless lengths
+    shorter = min(len(keyword), len(token))
+    if 200 * shorter / (len(keyword) + len(token)) < scorer.PARTIAL_MATCH_THRESHOLD - 0.5:
+        return False
+    return scorer.fuzz_ratio()(keyword, token) >= scorer.PARTIAL_MATCH_THRESHOLD
+
+
+class _LiveFuzzyIndex:
+    """Answers has_match for the JD keywords from counts kept up to date per vocabulary change"""
+
+    def __init__(self, live):
+        self._live = live
+
+    def has_match(self, query: str, threshold: float = scorer.PARTIAL_MATCH_THRESHOLD) -> bool:
+        hits = self._live._partial_hits.get(query)
+        if hits is None or threshold != scorer.PARTIAL_MATCH_THRESHOLD:
+            return scorer.FuzzyIndex(self._live.counts).has_match(query, threshold)
+        return hits > 0
+
+
+class LiveScorer:
+    """Keeps scores current while the resume and job description are edited
+
+    Text is handled line by line: tokens and section headers never span a
+    newline, so an edit only re-tokenizes the lines that changed, and the
+    running token counts, section headers and fuzzy keyword matches are
+    adjusted by the difference. Results equal scorer.get_score on the full
+    text. Not thread-safe; drive one instance from one worker.
+    """
+
+    def __init__(self, top_n: int = 30):
+        self.top_n = top_n
+        self._line_cache = OrderedDict()
+        # Resume state
+        self._resume_lines: List[str] = []
+        self.counts = Counter()
+        self.token_count = 0
+        self._header_counts = Counter()
+        self._phrases = None
+        self.fuzzy_index = _LiveFuzzyIndex(self)
+        # JD state
+        self._jd_lines: List[str] = None
+        self.profile = None
+        # JD keyword -> number of resume vocabulary tokens within the fuzzy threshold
+        self._partial_hits: Dict[str, int] = {}
+
+    @property
+    def sections(self) -> frozenset:
+        return frozenset(self._header_counts)
+
+    @property
+    def phrases(self) -> frozenset:
+        """Token pairs and triples of the whole resume, rebuilt from cached line tokens after an edit
+
+        Only keyphrase profiles ask for these. Phrases run across line
+        breaks, as they do in scorer.TokenizedText, so they are not kept per line.
+        """
+        if self._phrases is None:
+            tokens = [token for line in self._resume_lines for token in self._line(line)[0]]
+            self._phrases = frozenset(scorer._token_phrases(tokens))
+        return self._phrases
+
+    def _line(self, line: str):
+        """(tokens, header section name) for one line, cached by content"""
+        cached = self._line_cache.get(line)
+        if cached is not None:
+            self._line_cache.move_to_end(line)
+            return cached
+        cached = (scorer.tokenize(line), header_name(line))
+        self._line_cache[line] = cached
+        if len(self._line_cache) > LINE_CACHE_SIZE:
+            self._line_cache.popitem(last=False)
+        return cached
+
+    def set_resume(self, text: str):
+        lines = text.split("\n")
+        start, old_end, new_end = _changed_range(self._resume_lines, lines)
+        for line in self._resume_lines[start:old_end]:
+            self._apply_line(line, -1)
+        for line in lines[start:new_end]:
+            self._apply_line(line, +1)
+        if start != old_end or start != new_end:
+            self._phrases = None
+        self._resume_lines = lines
+
+    def _apply_line(self, line: str, sign: int):
+        tokens, header = self._line(line)
+        if header:
+            self._header_counts[header] += sign
+            if not self._header_counts[header]:
+                del self._header_counts[header]
+        self.token_count += sign * len(tokens)
+        for token in tokens:
+            before = self.counts[token]
+            self.counts[token] = before + sign
+            if before == 0:
+                self._vocabulary_changed(token, +1)
+            elif before + sign == 0:
+                del self.counts[token]
+                self._vocabulary_changed(token, -1)
+
+    def _vocabulary_changed(self, token: str, sign: int):
+        for keyword in self._partial_hits:
+            if _is_partial_match(keyword, token):
+                self._partial_hits[keyword] += sign
+
+    def set_jd(self, text: str):
+        lines = text.split("\n")
+        if lines == self._jd_lines:
+            return
+        self._jd_lines = lines
+        # Keyword ranking depends on first-occurrence order, so counts are
+        # rebuilt in document order; unchanged lines reuse their cached tokens
+        counts = Counter()
+        for line in lines:
+            counts.update(self._line(line)[0])
+        self.profile = scorer.JDProfile(text, top_n=self.top_n, counts=counts)
+
+        previous = self._partial_hits
+        self._partial_hits = {}
+        for keyword in self.profile.keywords:
+            if " " in keyword:
+                continue  # phrases get partial credit from their words, not fuzzy matching
+            if keyword in previous:
+                self._partial_hits[keyword] = previous[keyword]
+            else:
+                self._partial_hits[keyword] = sum(
+                    1 for token in self.counts if _is_partial_match(keyword, token)
+                )
+
+    def update(self, resume_text: str = None, jd_text: str = None) -> Dict[str, float]:
+        """Apply whichever texts changed and return the raw scores (as scorer.get_score)"""
+        if jd_text is not None:
+            self.set_jd(jd_text)
+        if resume_text is not None:
+            self.set_resume(resume_text)
+        if self.profile is None:
+            raise ValueError("No job description set")
+        return scorer.score_context(scorer.ScoringContext(self, self.profile))
@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, List, Set
+
+from core import scorer
+from core.config import load_config
+from core.pool import rewrite_sections_parallel
+from core.rewriter import segment_resume
+from core.tracing import TRACER
+
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_MAX_ROUNDS = 3
+MAX_HINT_KEYWORDS = 8  # missing JD keywords named in one retry prompt
+
+
+def keyword_threshold() -> float:
+    """keyword_match_threshold from config.yaml: the share of JD keywords to match, 0-1"""
+    return load_config().get("keyword_match_threshold", DEFAULT_THRESHOLD)
+
+
+def matched_keywords(text: str, keywords: Iterable[str]) -> Set[str]:
+    """The keywords with an exact or a partial (fuzzy) match in text"""
+    tokenized = scorer.TokenizedText(text)
+    return {
+        keyword
+        for keyword in keywords
+        if scorer.has_keyword(tokenized, keyword)
+        or (" " not in keyword and tokenized.fuzzy_index.has_match(keyword))
+    }
+
+
+def keyword_coverage(text: str, keywords: List[str]) -> float:
+    """Share of keywords matched in text, 0-1; nothing to match counts as covered
+
+    keyword_match cannot pass 70 (exact hits weigh 0.7), so thresholds are
+    set on this share instead.
+    """
+    if not keywords:
+        return 1.0
+    return len(matched_keywords(text, keywords)) / len(keywords)
+
+
+def missing_keywords(section_text: str, profile: scorer.JDProfile) -> List[str]:
+    """JD keywords with neither an exact nor a partial match in the section, most frequent first"""
+    matched = matched_keywords(section_text, profile.keywords)
+    missing = [keyword for keyword in profile.keywords if keyword not in matched]
+    return missing[:MAX_HINT_KEYWORDS]
+
+
+def assemble(sections: Dict[str, str]) -> str:
+    """Resume text from rewritten sections, one header line per section"""
+    return "\n\n".join(f"{name.capitalize()}\n{text}" for name, text in sections.items())
+
+
+def _pick_weak(best, scores, applicable, settled, profile, threshold):
+    """Sections to retry, in document order, with the keywords to name in each prompt
+
+    A section is weak when its rewrite dropped JD keywords its original text
+    covered, or when it is in the half of the remaining sections that match
+    the fewest JD keywords. Hints name the dropped keywords first, then the
+    JD keywords the whole resume still misses.
+    """
+    open_sections = [name for name in best if name not in settled]
+    matched = {name: matched_keywords(best[name], profile.keywords) for name in open_sections}
+    dropped = {
+        name: [kw for kw in applicable.get(name, ()) if kw not in matched[name]]
+        for name in open_sections
+    }
+    lowest = sorted(open_sections, key=lambda name: scores[name])[: (len(open_sections) + 1) // 2]
+    weak = [
+        name
+        for name in open_sections
+        if name in lowest
+        or keyword_coverage(best[name], applicable.get(name, [])) < threshold
+    ]
+
+    covered = matched_keywords(assemble(best), profile.keywords)
+    resume_missing = [kw for kw in profile.keywords if kw not in covered]
+    keywords = {}
+    for name in weak:
+        hints = list(dropped[name])
+        hints += [kw for kw in resume_missing if kw not in hints]
+        keywords[name] = hints[:MAX_HINT_KEYWORDS]
+    return [name for name in weak if keywords[name]], keywords
+
+
+def optimize_sections(
+    resume_text, jd_text, threshold=None, max_rounds=None, use_cache=True, jd_mode=None
+):
+    """Rewrite, then regenerate the sections that hold the resume below the keyword target
+
+    Yields the events of rewrite_sections_parallel for every pass, plus:
+      ("score", section, "<coverage %>") after each section is scored
+      ("round", "", "<section>, ...")    before a retry pass over those sections
+      ("final", section, text)            the best version of every section, in order
+
+    threshold is the share of JD keywords to match, 0-1 (default:
+    keyword_match_threshold in config.yaml). A section's score is the share
+    of all JD keywords it matches, on that same scale. After each pass the
+    whole resume is scored; if it meets the target the loop stops.
+    Otherwise the sections that dropped keywords they used to cover and the
+    half that match the fewest JD keywords (see _pick_weak) are rewritten
+    again from their best version, with the missing keywords named in the
+    prompt. A retry that does not raise a section's score is discarded and
+    that section is left alone from then on, as is any section cut short by
+    its output budget. At most max_rounds passes run in total.
+    """
+    if threshold is None:
+        threshold = keyword_threshold()
+    if max_rounds is None:
+        max_rounds = load_config().get("optimize_max_rounds", DEFAULT_MAX_ROUNDS)
+    profile = scorer.build_jd_profile(jd_text)
+    # JD keywords each original section covers, in JD keyword order
+    applicable = {}
+    for name, text in segment_resume(resume_text).items():
+        covered = matched_keywords(text, profile.keywords)
+        applicable[name] = [keyword for keyword in profile.keywords if keyword in covered]
+
+    best: Dict[str, str] = {}
+    scores: Dict[str, float] = {}
+    settled = set()
+    segments = None
+    keywords = None
+    for round_number in range(1, max(max_rounds, 1) + 1):
+        if round_number > 1:
+            if keyword_coverage(assemble(best), profile.keywords) >= threshold:
+                break
+            weak, keywords = _pick_weak(best, scores, applicable, settled, profile, threshold)
+            if not weak:
+                break
+            segments = {name: best[name] for name in weak}
+            yield "round", "", ", ".join(weak)
+
+        with TRACER.span("optimize_round", round=round_number) as trace:
+            truncated = set()
+            for event, section, text in rewrite_sections_parallel(
+                resume_text,
+                jd_text,
+                use_cache=use_cache,
+                jd_mode=jd_mode,
+                segments=segments,
+                keywords=keywords,
+            ):
+                yield event, section, text
+                if event == "error":
+                    return
+                if event == "truncated":
+                    truncated.add(section)
+                    settled.add(section)
+                elif event == "end":
+                    score = keyword_coverage(text, profile.keywords)
+                    if section not in best:
+                        best[section] = text
+                        scores[section] = score
+                    elif score > scores[section] and section not in truncated:
+                        best[section] = text
+                        scores[section] = score
+                    else:
+                        settled.add(section)
+                    yield "score", section, str(round(scores[section] * 100, 2))
+            trace["sections"] = len(segments) if segments is not None else len(best)
+
+    for name, text in best.items():
+        yield "final", name, text
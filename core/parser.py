@@ -1,6 +1,14 @@
-from pdfminer.high_level import extract_text as extract_pdf_text
-from docx import Document
 import os
+import threading
+
+from core.cache import DiskCache, content_hash, file_hash
+from core.config import load_config
+from core.tracing import TRACER
+
+# Bump when extraction output changes so stale cached text is not reused
+PARSER_VERSION = "1"
+# Below this many pages per worker, process start-up costs more than it saves
+MIN_PAGES_PER_WORKER = 2
 
 
 def parse_text_file(filepath):
@@ -8,22 +16,145 @@ def parse_text_file(filepath):
         return f.read()
 
 
+# pdfminer and python-docx take a good part of a second to import, so they
+# are loaded on the first document of their type rather than at start-up
+def extract_pdf_text(filepath, **kwargs):
+    from pdfminer.high_level import extract_text
+
+    return extract_text(filepath, **kwargs)
+
+
 def parse_docx_file(filepath):
+    from docx import Document
+
     doc = Document(filepath)
     return "\n".join([p.text for p in doc.paragraphs])
 
 
-def parse_pdf_file(filepath):
-    return extract_pdf_text(filepath)
+def pdf_page_count(filepath):
+    from pdfminer.pdfpage import PDFPage
 
+    with open(filepath, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
 
-def parse_file(filepath):
-    ext = os.path.splitext(filepath)[-1].lower()
+
+def _extract_pdf_pages(filepath, page_numbers):
+    return extract_pdf_text(filepath, page_numbers=page_numbers)
+
+
+_pdf_pool = None
+_pdf_pool_size = 0
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool(workers):
+    global _pdf_pool, _pdf_pool_size
+    with _pdf_pool_lock:
+        if _pdf_pool is None or _pdf_pool_size < workers:
+            if _pdf_pool is not None:
+                _pdf_pool.shutdown(wait=False)
+            # Process pools are only imported once a long PDF needs one
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: forking a process that runs Tk and worker threads is unsafe
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pdf_pool_size = workers
+        return _pdf_pool
+
+
+def parse_pdf_file(filepath, max_pages=None, workers=None):
+    """Extract PDF text, splitting the pages across worker processes for long documents
+
+    max_pages stops after the first N pages. workers=1 extracts serially;
+    None uses up to four processes when the document is long enough.
+    """
+    if workers == 1:
+        return extract_pdf_text(filepath, maxpages=max_pages or 0)
+
+    pages = pdf_page_count(filepath)
+    if max_pages:
+        pages = min(pages, max_pages)
+    workers = min(workers or min(4, os.cpu_count() or 1), pages // MIN_PAGES_PER_WORKER)
+    if workers < 2:
+        return extract_pdf_text(filepath, maxpages=max_pages or 0)
+
+    # Contiguous page ranges, one per worker, joined back in page order
+    step, extra = divmod(pages, workers)
+    groups, start = [], 0
+    for index in range(workers):
+        end = start + step + (1 if index < extra else 0)
+        groups.append(list(range(start, end)))
+        start = end
+
+    pool = _get_pdf_pool(workers)
+    return "".join(pool.map(_extract_pdf_pages, [filepath] * len(groups), groups))
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """On-disk cache of extracted text, or None when disabled in config.yaml"""
+    global _parse_cache
+    with _parse_cache_lock:
+        if _parse_cache is None:
+            cfg = load_config()
+            path = cfg.get("parse_cache_path", ".cache/parsed.sqlite")
+            if not path:
+                return None
+            max_mb = cfg.get("parse_cache_max_mb", 256)
+            _parse_cache = DiskCache(path, max_bytes=int(max_mb * 1024 * 1024))
+        return _parse_cache
+
+
+def _parse_uncached(filepath, ext, max_pages, pdf_workers):
     if ext == ".txt":
         return parse_text_file(filepath)
     elif ext == ".pdf":
-        return parse_pdf_file(filepath)
+        return parse_pdf_file(filepath, max_pages=max_pages, workers=pdf_workers)
     elif ext == ".docx":
         return parse_docx_file(filepath)
     else:
         raise ValueError(f"Unsupported file type: {ext}")
+
+
+def parse_file(filepath, max_pages=None, use_cache=True, pdf_workers=None):
+    ext = os.path.splitext(filepath)[-1].lower()
+    with TRACER.span("parse_file", file_type=ext.lstrip(".")) as span:
+        text, span["cache"] = _parse_file(filepath, ext, max_pages, use_cache, pdf_workers)
+        span["chars"] = len(text)
+        return text
+
+
+def _parse_file(filepath, ext, max_pages, use_cache, pdf_workers):
+    """Extracted text plus how the parse cache was used: off, hit or miss"""
+    cache = get_parse_cache() if use_cache and ext in (".txt", ".pdf", ".docx") else None
+    if cache is None:
+        return _parse_uncached(filepath, ext, max_pages, pdf_workers), "off"
+
+    options = f"{PARSER_VERSION}:{max_pages or 0}"
+    # Fast path: same path, size and mtime as a file parsed before
+    stat = os.stat(filepath)
+    stat_key = content_hash(
+        "stat", os.path.abspath(filepath), str(stat.st_size), str(stat.st_mtime_ns), options
+    )
+    content_key = cache.get(stat_key)
+    if content_key is not None:
+        text = cache.get(content_key)
+        if text is not None:
+            return text, "hit"
+
+    # Slow path: identical bytes parsed before under any name or mtime
+    content_key = content_hash("content", ext, options, file_hash(filepath))
+    text = cache.get(content_key)
+    outcome = "hit"
+    if text is None:
+        text = _parse_uncached(filepath, ext, max_pages, pdf_workers)
+        cache.put(content_key, text)
+        outcome = "miss"
+    cache.put(stat_key, content_key)
+    return text, outcome
@@ -0,0 +1,217 @@
+import atexit
+import os
+import threading
+from concurrent.futures import as_completed
+
+from core import rewriter
+from core.tracing import TRACER
+
+
+# Worker side: each process owns one model instance with its share of the cores
+def _init_worker(threads):
+    # use_mmap lets every worker map the same GGUF pages instead of copying the weights.
+    # Tuned single-instance thread counts would oversubscribe, so workers keep their share.
+    rewriter.MODEL = rewriter.ModelManager(
+        idle_timeout=0, n_threads=threads, n_threads_batch=threads, use_mmap=True
+    )
+
+
+def _warm():
+    rewriter.MODEL.get()
+    return os.getpid()
+
+
+def _plan(section_name, section_text, jd_text):
+    return rewriter.plan_section_chunks(section_name, section_text, jd_text)
+
+
+def _rewrite_chunk(label, chunk, jd_text, keywords=None):
+    outcome = {}
+    text = rewriter.generate_rewrite(label, chunk, jd_text, outcome=outcome, keywords=keywords)
+    # Ship this worker's spans back so the parent sees every generation
+    return text, outcome, TRACER.drain()
+
+
+class RewritePool:
+    """N llama.cpp model instances in worker processes that rewrite sections in parallel
+
+    Decode is memory-bandwidth bound, so several instances with a few threads
+    each get more out of a large machine than one instance with many threads.
+    Threads are split evenly between workers unless given explicitly.
+    A running chunk cannot be cancelled, so a rewrite stopped mid-chunk
+    terminates the workers (when no other rewrite is using them) and the
+    next rewrite starts fresh ones, which reload the model.
+    """
+
+    def __init__(self, workers=None, threads_per_worker=None):
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus // 4)
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.workers)
+        self._lock = threading.Lock()
+        self._active = 0  # rewrite_sections generators currently using the workers
+        self._executor = self._start_executor()
+
+    def _start_executor(self):
+        # Imported here so loading the GUI does not pay for process pool machinery
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn: forking a process that already runs Tk or model threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+
+    def _restart(self):
+        """Kill the workers, stopping chunks that are mid-decode, and start a fresh executor"""
+        executor = self._executor
+        # ProcessPoolExecutor has no public way to stop a running call
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self._executor = self._start_executor()
+
+    def prewarm(self):
+        """Load a model in every worker now instead of on the first rewrite"""
+        return [self._executor.submit(_warm) for _ in range(self.workers)]
+
+    def rewrite_sections(
+        self, resume_text, jd_text, use_cache=True, jd_mode=None, segments=None, keywords=None
+    ):
+        """Yield the same events as rewriter.rewrite_sections_incremental, in document order
+
+        All sections (and the chunks of oversized ones) are rewritten at the
+        same time; each section is reported as soon as it and every section
+        before it are finished. Sections arrive whole, not token by token.
+        """
+        if segments is None:
+            segments = rewriter.segment_resume(resume_text)
+        keywords = keywords or {}
+        if not segments:
+            yield "error", "Error", "Could not segment the resume. Use standard section headers like 'Experience', 'Skills', etc."
+            return
+
+        jd_text = rewriter.prepare_jd(jd_text, jd_mode)
+        cache = rewriter.get_rewrite_cache() if use_cache else None
+        sections = [(name, text) for name, text in segments.items() if text.strip()]
+        cached = {}
+        plans = {}
+        jobs = {}
+        # Counted before anything is submitted, so no other rewrite restarts the workers under it
+        with self._lock:
+            self._active += 1
+        try:
+            for name, text in sections:
+                if cache is not None:
+                    hit = cache.get(
+                        rewriter.rewrite_cache_key(name, text, jd_text, keywords=keywords.get(name))
+                    )
+                    if hit is not None:
+                        cached[name] = hit
+                        continue
+                plans[self._executor.submit(_plan, name, text, jd_text)] = name
+
+            # Planning only tokenizes, so queue every chunk as soon as its plan is known
+            for future in as_completed(plans):
+                name = plans[future]
+                jobs[name] = [
+                    self._executor.submit(
+                        _rewrite_chunk, label, chunk, jd_text, keywords.get(name)
+                    )
+                    for label, chunk in rewriter.label_chunks(name, future.result())
+                ]
+
+            for name, text in sections:
+                yield "start", name, ""
+                if name in cached:
+                    rewritten = cached[name]
+                else:
+                    parts = []
+                    outcomes = []
+                    for job in jobs[name]:
+                        part, outcome, spans = job.result()
+                        TRACER.absorb(spans)
+                        parts.append(part)
+                        outcomes.append(outcome)
+                    rewritten = "\n".join(parts).strip()
+                    if rewriter.budget_hit(outcomes):
+                        yield "token", name, rewritten
+                        yield "truncated", name, rewriter.TRUNCATED_MESSAGE
+                        yield "end", name, rewritten
+                        continue
+                    if cache is not None:
+                        cache.put(
+                            rewriter.rewrite_cache_key(
+                                name, text, jd_text, keywords=keywords.get(name)
+                            ),
+                            rewritten,
+                        )
+                yield "token", name, rewritten
+                yield "end", name, rewritten
+        finally:
+            # A consumer that stops early (cancelled rewrite) drops the queued chunks
+            futures = list(plans) + [job for section_jobs in jobs.values() for job in section_jobs]
+            for future in futures:
+                future.cancel()
+            running = any(not future.done() for future in futures)
+            with self._lock:
+                self._active -= 1
+                # Still decoding: free the CPU now, unless another rewrite shares the workers
+                if running and not self._active:
+                    self._restart()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_rewrite_pool():
+    """Shared pool sized by llm_pool_workers in config.yaml, or None when disabled"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            cfg = rewriter.load_config()
+            workers = cfg.get("llm_pool_workers", 0)
+            if not workers or workers < 2:
+                return None
+            _pool = RewritePool(workers, cfg.get("llm_pool_threads_per_worker"))
+            atexit.register(shutdown_rewrite_pool)
+        return _pool
+
+
+def shutdown_rewrite_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def rewrite_sections_parallel(
+    resume_text, jd_text, use_cache=True, jd_mode=None, segments=None, keywords=None
+):
+    """Rewrite on the shared pool when configured, otherwise stream in process"""
+    pool = get_rewrite_pool()
+    if pool is None:
+        return rewriter.rewrite_sections_incremental(
+            resume_text,
+            jd_text,
+            use_cache=use_cache,
+            jd_mode=jd_mode,
+            segments=segments,
+            keywords=keywords,
+        )
+    return pool.rewrite_sections(
+        resume_text,
+        jd_text,
+        use_cache=use_cache,
+        jd_mode=jd_mode,
+        segments=segments,
+        keywords=keywords,
+    )
@@ -1,85 +1,735 @@
-from llama_cpp import Llama
 import os
 import re
-import yaml
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 
-# Load model once
+from core import scorer
+from core.cache import DiskCache, content_hash
+from core.config import load_config
+from core.sections import detect_sections
+from core.tracing import TRACER
 
-with open("config.yaml", "r") as f:
-    cfg = yaml.safe_load(f)
+DEFAULT_IDLE_TIMEOUT = 600  # seconds a loaded model may sit unused
+DEFAULT_PROMPT_CACHE_MB = 512  # KV states kept for reusing evaluated prompt prefixes
+# Bump whenever the prompt or generation settings change so stale rewrites are not reused
+PROMPT_VERSION = "4"
 
 
-LLM = Llama(
-    model_path=cfg["llm_model_path"],
-    n_ctx=4096,
-    n_threads=6,
-    n_gpu_layers=0,  # or >0 if using GPU acceleration
-    verbose=False,
-)
+DEFAULT_N_CTX = 4096
 
 
-# Dynamic segmentation
-def segment_resume(text):
-    sections = {
-        "summary": r"(summary|profile|objective)",
-        "experience": r"(experience|employment|work history|professional experience)",
-        "skills": r"(skills|technologies|tools|competencies)",
-        "education": r"(education|academics|certifications)",
-        "projects": r"(projects|portfolio|case studies)",
+def default_threads():
+    """Half the logical CPUs: one thread per physical core on SMT machines"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def llama_settings():
+    """Llama runtime parameters from config.yaml (see "cli.py autotune")"""
+    cfg = load_config()
+    settings = {
+        "n_ctx": cfg.get("llm_n_ctx") or DEFAULT_N_CTX,
+        "n_threads": cfg.get("llm_n_threads") or default_threads(),
+        "n_gpu_layers": cfg.get("llm_n_gpu_layers") or 0,  # >0 offloads layers to a GPU build
     }
+    # Left unset, llama.cpp picks its own batch size and prompt threads
+    for key in ("n_batch", "n_threads_batch"):
+        if cfg.get(f"llm_{key}"):
+            settings[key] = cfg[f"llm_{key}"]
+    return settings
+
+
+class ModelManager:
+    """Owns the Llama instance: loaded on first use, released after sitting idle
+
+    The model is only constructed when a rewrite actually needs it (or when
+    prewarm() is called), so importing this module stays cheap. After
+    `idle_timeout` seconds without use the model is dropped to give the memory
+    back; the next rewrite loads it again. A timeout of 0 keeps it resident.
+    A llama.cpp context is not safe for concurrent use, so sessions on one
+    manager run one at a time; parallel rewrites need core.pool's processes.
+    """
+
+    def __init__(self, model_path: str = None, idle_timeout: float = None, **llama_kwargs):
+        self._model_path = model_path
+        self._idle_timeout = idle_timeout
+        self._llama_kwargs = llama_kwargs
+        self._llm = None
+        self._lock = threading.RLock()
+        # Held for a whole session. A plain Lock: a streaming generator may be
+        # finalised on a different thread from the one that opened it.
+        self._generation_lock = threading.Lock()
+        self._in_use = 0
+        self._last_used = 0.0
+        self._idle_timer = None
+
+    @property
+    def model_path(self) -> str:
+        return self._model_path or load_config()["llm_model_path"]
+
+    @property
+    def idle_timeout(self) -> float:
+        if self._idle_timeout is not None:
+            return self._idle_timeout
+        return load_config().get("llm_idle_timeout", DEFAULT_IDLE_TIMEOUT)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._llm is not None
+
+    def _load(self):
+        from llama_cpp import Llama
+
+        settings = {"verbose": False, **llama_settings()}
+        settings.update(self._llama_kwargs)
+        llm = Llama(model_path=self.model_path, **settings)
+        self._attach_prompt_cache(llm)
+        return llm
+
+    def _attach_prompt_cache(self, llm):
+        """Keep KV states of evaluated prompts so the shared system+JD prefix is evaluated once
+
+        llama.cpp restores the cached state with the longest matching token
+        prefix and only evaluates what follows it, so every section after the
+        first (and every later resume against the same JD) skips the prefix.
+        A disk cache path keeps those states across sessions.
+        """
+        cfg = load_config()
+        capacity_mb = cfg.get("llm_prompt_cache_mb", DEFAULT_PROMPT_CACHE_MB)
+        if not capacity_mb:
+            return
+        from llama_cpp import LlamaDiskCache, LlamaRAMCache
+
+        capacity = int(capacity_mb * 1024 * 1024)
+        path = cfg.get("llm_prompt_cache_path")
+        if path:
+            cache = LlamaDiskCache(cache_dir=path, capacity_bytes=capacity)
+        else:
+            cache = LlamaRAMCache(capacity_bytes=capacity)
+        llm.set_cache(cache)
+
+    def get(self):
+        """Return the loaded model, loading it if needed"""
+        with self._lock:
+            if self._llm is None:
+                self._llm = self._load()
+            self._last_used = time.monotonic()
+            return self._llm
+
+    @contextmanager
+    def session(self):
+        """Hold the model for the duration of a generation so it cannot be unloaded
+
+        Waits for any other session on this model to finish first.
+        """
+        with self._generation_lock:
+            with self._lock:
+                llm = self.get()
+                self._in_use += 1
+                self._cancel_idle_timer()
+            try:
+                yield llm
+            finally:
+                with self._lock:
+                    self._in_use -= 1
+                    self._last_used = time.monotonic()
+                    if self._in_use == 0:
+                        self._schedule_idle_unload()
+
+    def prewarm(self) -> threading.Thread:
+        """Load the model in a background thread so the first rewrite starts fast"""
+
+        def warm():
+            try:
+                with self.session():
+                    pass
+            except Exception:
+                # A failed prewarm is reported again by the first real rewrite
+                pass
+
+        thread = threading.Thread(target=warm, daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self):
+        """Release the model now, unless a generation is still running"""
+        with self._lock:
+            if self._in_use:
+                return False
+            self._cancel_idle_timer()
+            llm, self._llm = self._llm, None
+        if llm is not None:
+            close = getattr(llm, "close", None)
+            if close is not None:
+                close()
+        return llm is not None
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _schedule_idle_unload(self):
+        timeout = self.idle_timeout
+        if not timeout or timeout <= 0:
+            return
+        self._cancel_idle_timer()
+        self._idle_timer = threading.Timer(timeout, self._unload_if_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _unload_if_idle(self):
+        with self._lock:
+            idle_for = time.monotonic() - self._last_used
+            if self._in_use or idle_for < self.idle_timeout:
+                return
+        self.unload()
+
+
+# Shared model manager; nothing is loaded until the first rewrite
+MODEL = ModelManager()
+
+_rewrite_cache = None
+_rewrite_cache_lock = threading.Lock()
 
-    text_lower = text.lower()
-    segmented = {}
-    last_match = 0
-    keys = list(sections.keys())
-    positions = {}
 
-    for key in keys:
-        pattern = re.compile(sections[key], re.IGNORECASE)
-        match = pattern.search(text)
-        if match:
-            positions[key] = match.start()
+def get_rewrite_cache():
+    """Return the on-disk rewrite cache, or None when disabled in config.yaml"""
+    global _rewrite_cache
+    with _rewrite_cache_lock:
+        if _rewrite_cache is None:
+            cfg = load_config()
+            path = cfg.get("rewrite_cache_path", ".cache/rewrites.sqlite")
+            if not path:
+                return None
+            max_mb = cfg.get("rewrite_cache_max_mb", 64)
+            _rewrite_cache = DiskCache(path, max_bytes=int(max_mb * 1024 * 1024))
+        return _rewrite_cache
 
-    sorted_keys = sorted(positions, key=lambda x: positions[x])
-    for i, key in enumerate(sorted_keys):
-        start = positions[key]
-        end = positions[sorted_keys[i + 1]] if i + 1 < len(sorted_keys) else len(text)
-        segmented[key] = text[start:end].strip()
 
-    return segmented
+def rewrite_cache_key(section_name, section_text, jd_text, model_path=None, keywords=None):
+    """Cache key for one section rewrite: model, prompt version, section and content hashes"""
+    parts = [
+        model_path or MODEL.model_path,
+        PROMPT_VERSION,
+        section_name,
+        content_hash(section_text),
+        content_hash(jd_text),
+    ]
+    if keywords:
+        parts.append(",".join(keywords))
+    return content_hash(*parts)
+
+
+# Dynamic segmentation on header lines, shared with the scorer
+def segment_resume(text):
+    with TRACER.span("segment_resume", chars=len(text)) as trace:
+        segmented = {}
+        for span in detect_sections(text):
+            content = text[span.start : span.end].strip()
+            if span.name in segmented:
+                # A repeated header (e.g. a second experience block) extends the section
+                segmented[span.name] += "\n\n" + content
+            else:
+                segmented[span.name] = content
+        trace["sections"] = len(segmented)
+        return segmented
+
+
+# JD digest: condense the posting once per job so section prompts skip boilerplate
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_BULLET_RE = re.compile(r"^\s*(?:[-*\u2022\u25cf\u25aa]+|\d{1,2}[.)])\s*")
+_REQUIREMENT_RE = re.compile(
+    r"\b(must|required|requirements?|qualifications?|experience (with|in)|proficien\w*|"
+    r"knowledge of|familiar\w*|expertise|ability to|responsib\w*|you will|you'll|"
+    r"degree|bachelor\w*|master\w*|years?|skills?|strong|hands-on|preferred|plus)\b",
+    re.IGNORECASE,
+)
+# Boilerplate is recognised by block heading or by phrases that only occur in
+# it; single words like "vision", "race" or "insurance" are real requirements too
+_HEADING_RE = re.compile(r"^\s*([#*]*)\s*([A-Za-z][\w&'/,\- ]{0,60}?)\s*(:?)[\s*#]*$")
+_BOILERPLATE_HEADING_RE = re.compile(
+    r"^(benefits|perks|perks (&|and) benefits|what we offer|compensation( (&|and) benefits)?|"
+    r"equal (employment )?opportunity|eeo( statement)?|diversity( (&|and) inclusion)?|"
+    r"about (us|the company|the team|(?!you$|the role$|this role$)\w+)|who we are|"
+    r"our (mission|story|values)|privacy( notice| policy)?|how to apply)$",
+    re.IGNORECASE,
+)
+_ROLE_HEADING_RE = re.compile(
+    r"^(requirements|qualifications|responsibilities|duties|skills|nice to have|preferred|"
+    r"must have|about (you|the role|this role)|the role|your role|who you are|"
+    r"what you('ll| will) (do|bring|need)|minimum qualifications|preferred qualifications)$",
+    re.IGNORECASE,
+)
+_BOILERPLATE_RE = re.compile(
+    r"\b(equal (employment )?opportunity|affirmative action|without regard to|"
+    r"sexual orientation|gender identity|national origin|protected veteran|"
+    r"reasonable accommodations?|medical, dental|dental and vision|health insurance|"
+    r"401\(?k\)?|paid time off|parental leave|competitive (salary|compensation)|"
+    r"salary range|benefits package|privacy (notice|policy)|apply now)\b",
+    re.IGNORECASE,
+)
+_SENIORITY_LEVELS = [
+    ("Principal", r"\b(principal|distinguished|architect)\b"),
+    ("Staff", r"\bstaff\b"),
+    ("Director", r"\b(director|head of|vp|vice president)\b"),
+    ("Manager", r"\bmanager\b"),
+    ("Lead", r"\b(lead|tech lead|team lead)\b"),
+    ("Senior", r"\b(senior|sr\.?)\b"),
+    ("Mid-level", r"\b(mid-level|mid level|intermediate)\b"),
+    ("Junior", r"\b(junior|jr\.?|entry[- ]level|graduate)\b"),
+    ("Intern", r"\b(intern|internship)\b"),
+]
+_SENIORITY_RES = [(label, re.compile(pattern, re.IGNORECASE)) for label, pattern in _SENIORITY_LEVELS]
+# Outside the title these words are everyday JD wording ("lead projects",
+# "report to the engineering manager", "principal duties"), not the role level
+_BODY_SENIORITY_RES = [
+    (label, re.compile(pattern, re.IGNORECASE))
+    for label, pattern in [("Principal", r"\b(principal|distinguished) (engineer|scientist|developer)\b")]
+    + [level for level in _SENIORITY_LEVELS if level[0] in ("Senior", "Mid-level", "Junior", "Intern")]
+]
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?years?", re.IGNORECASE)
+
+
+def detect_seniority(jd_text):
+    """Best guess at the role level, e.g. "Senior (5+ years)", or "" if unclear
+
+    The level comes from the title (the first non-empty line); the rest of the
+    posting is only read for it when the title names none.
+    """
+    title, _, body = jd_text.strip().partition("\n")
+    level = next((label for label, regex in _SENIORITY_RES if regex.search(title)), "")
+    if not level:
+        level = next((label for label, regex in _BODY_SENIORITY_RES if regex.search(body)), "")
+    years = [int(match) for match in _YEARS_RE.findall(jd_text)]
+    if years:
+        level = f"{level} ({max(years)}+ years)".strip()
+    return level
+
+
+def strip_boilerplate(jd_text):
+    """The JD without its benefits, EEO and company blocks
 
+    A block starts at a boilerplate heading line ("Benefits", "About us") and
+    runs to the next marked heading ("Requirements:", "## Stack") or known
+    role heading ("Responsibilities"); a bare "Dental" line inside a benefits
+    list does not end it.
+    """
+    kept = []
+    in_boilerplate = False
+    for line in jd_text.split("\n"):
+        heading = _HEADING_RE.match(line)
+        if heading and len(heading.group(2).split()) <= 5:
+            title = heading.group(2)
+            if _BOILERPLATE_HEADING_RE.match(title):
+                in_boilerplate = True
+            elif heading.group(1) or heading.group(3) or _ROLE_HEADING_RE.match(title):
+                in_boilerplate = False
+        if not in_boilerplate:
+            kept.append(line)
+    return "\n".join(kept)
 
-# Llama 3.2 chat format
-def generate_rewrite(section_name, section_text, jd_text):
+
+def requirement_sentences(jd_text, keywords, limit=12):
+    """Requirement-like sentences from the JD, boilerplate dropped, most keyword-dense first"""
+    keyword_set = set(keywords)
+    candidates = []
+    seen = set()
+    for position, raw in enumerate(_SENTENCE_SPLIT_RE.split(jd_text)):
+        sentence = _BULLET_RE.sub("", raw or "").strip()
+        # Skip fragments, headings ("Requirements:") and repeats
+        if len(sentence) < 15 or sentence.endswith(":") or sentence.lower() in seen:
+            continue
+        seen.add(sentence.lower())
+        if _BOILERPLATE_RE.search(sentence):
+            continue
+        hits = sum(1 for token in set(scorer.tokenize(sentence)) if token in keyword_set)
+        if not hits and not _REQUIREMENT_RE.search(sentence):
+            continue
+        weight = hits + (2 if _REQUIREMENT_RE.search(sentence) else 0)
+        candidates.append((-weight, position, sentence))
+
+    best = sorted(candidates)[:limit]
+    # Keep the original order so the digest still reads like the posting
+    return [sentence for _, _, sentence in sorted(best, key=lambda item: item[1])]
+
+
+@lru_cache(maxsize=32)
+def build_jd_digest(jd_text, top_keywords=20, max_requirements=12):
+    """Compact summary of a job description: level, key terms and requirement sentences"""
+    # Key terms come from the filtered text so benefits and EEO wording stays out
+    body = strip_boilerplate(jd_text)
+    keywords = scorer.extract_keywords(body, top_n=top_keywords)
+    lines = []
+    seniority = detect_seniority(body)
+    if seniority:
+        lines.append(f"Role level: {seniority}")
+    if keywords:
+        lines.append("Key terms: " + ", ".join(keywords))
+    requirements = requirement_sentences(body, keywords, limit=max_requirements)
+    if requirements:
+        lines.append("Requirements:")
+        lines.extend(f"- {sentence}" for sentence in requirements)
+    # Nothing useful extracted (very short JD); fall back to the text itself
+    return "\n".join(lines) if requirements else jd_text.strip()
+
+
+def prepare_jd(jd_text, mode=None):
+    """JD text for section prompts: the digest, or the raw text in "full" mode"""
+    mode = mode or load_config().get("jd_prompt_mode", "digest")
+    if mode == "full":
+        return jd_text
+    return build_jd_digest(jd_text)
+
+
+SYSTEM_PROMPT = "You are an expert resume editor. Rewrite the user's resume section to improve alignment with a specific job description. Use a clear, concise, and professional tone."
+REWRITE_INSTRUCTION = "Rewrite this section to better match the job description, in the message you are responding with just send the section without any additional notes."
+KEYWORD_INSTRUCTION = "Where the section genuinely supports it, work in these job description keywords: {keywords}."
+
+
+# Llama 3.2 chat format. The system prompt and job description come first so
+# every section of every resume for one JD shares the same evaluated prefix.
+def build_messages(section_name, section_text, jd_text, keywords=None):
     messages = [
-        {
-            "role": "system",
-            "content": f"You are an expert resume editor. Rewrite the user's resume section to improve alignment with a specific job description. Use a clear, concise, and professional tone.",
-        },
-        {
-            "role": "user",
-            "content": f"""Resume Section: {section_name}\n\n{section_text}""",
-        },
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": f"""Job Description:\n{jd_text}"""},
         {
             "role": "user",
-            "content": "Rewrite this section to better match the job description, in the message you are responding with just send the section without any additional notes.",
+            "content": f"""Resume Section: {section_name}\n\n{section_text}""",
         },
+        {"role": "user", "content": REWRITE_INSTRUCTION},
+    ]
+    if keywords:
+        # Targeted retries name the JD keywords the section still misses
+        messages[-1]["content"] += " " + KEYWORD_INSTRUCTION.format(keywords=", ".join(keywords))
+    return messages
+
+
+# Generation budgets: output length follows the input length and section type
+MIN_OUTPUT_TOKENS = 64
+OUTPUT_SLACK_TOKENS = 48  # room for a rewrite to add a keyword-rich phrase or two
+DEFAULT_OUTPUT_RATIO = 1.4
+OUTPUT_RATIOS = {
+    "summary": 1.5,
+    "experience": 1.4,
+    "projects": 1.4,
+    "achievements": 1.3,
+    "skills": 1.2,
+    "education": 1.2,
+}
+
+# Lines that begin commentary instead of resume text
+NOTE_STOPS = [
+    "\nNote:",
+    "\nNotes:",
+    "\nNote -",
+    "\n*Note",
+    "\n(Note",
+    "\n**Note",
+    "\nChanges made",
+    # First-person lines are normal in a summary ("I have led teams of..."), so
+    # only note-like phrasing, or a change report after a blank line, stops
+    "\nI hope this",
+    "\nLet me know",
+    "\n\nI've made",
+    "\n\nI have made",
+    "\n\nI made the",
+    "\nThis rewritten",
+    "\nThe rewritten",
+    "\nExplanation",
+]
+
+
+def _section_type(section_name):
+    # Chunk labels look like "experience (part 2 of 3)"
+    return section_name.split(" (", 1)[0].strip().lower()
+
+
+def output_ratio(section_name):
+    return OUTPUT_RATIOS.get(_section_type(section_name), DEFAULT_OUTPUT_RATIO)
+
+
+def output_budget(input_tokens, section_name, max_tokens=None):
+    """max_tokens for rewriting a section of `input_tokens` tokens"""
+    budget = int(input_tokens * output_ratio(section_name)) + OUTPUT_SLACK_TOKENS
+    return max(MIN_OUTPUT_TOKENS, min(budget, max_tokens or MAX_OUTPUT_TOKENS))
+
+
+@lru_cache(maxsize=16)
+def stop_sequences(section_name):
+    """Stop on commentary and on the header of any other section"""
+    own = _section_type(section_name)
+    stops = list(NOTE_STOPS)
+    for name in OUTPUT_RATIOS:
+        if name == own:
+            continue
+        for title in (name.capitalize(), name.upper()):
+            stops += [f"\n{title}\n", f"\n{title}:", f"\n# {title}", f"\n## {title}", f"\n**{title}"]
+    return tuple(stops)
+
+
+def stream_rewrite(
+    section_name, section_text, jd_text, max_tokens=None, outcome=None, keywords=None
+):
+    """Yield the rewritten section piece by piece as the model decodes it
+
+    max_tokens defaults to an adaptive budget (see output_budget). If given,
+    `outcome` is filled with the budget and the finish reason, "length"
+    meaning the budget ran out before the model finished. `keywords` asks
+    the model to work in JD keywords the section is missing.
+    """
+    messages = build_messages(section_name, section_text, jd_text, keywords)
+
+    with MODEL.session() as llm, TRACER.span("generate_rewrite", section=section_name) as trace:
+        if max_tokens is None:
+            max_tokens = output_budget(count_tokens(llm, section_text), section_name)
+        trace["max_tokens"] = max_tokens
+        if outcome is not None:
+            outcome["max_tokens"] = max_tokens
+        if TRACER.enabled:
+            # Message text only; the chat template adds a few tokens per message
+            trace["prompt_tokens"] = sum(count_tokens(llm, m["content"]) for m in messages)
+        start = time.perf_counter()
+        first_token_at = None
+        completion_tokens = 0
+        started = False
+        try:
+            for chunk in llm.create_chat_completion(
+                messages,
+                max_tokens=max_tokens,
+                stop=list(stop_sequences(section_name)),
+                stream=True,
+            ):
+                choice = chunk["choices"][0]
+                if choice.get("finish_reason"):
+                    trace["finish_reason"] = choice["finish_reason"]
+                    trace["budget_hit"] = choice["finish_reason"] == "length"
+                    if outcome is not None:
+                        outcome["finish_reason"] = choice["finish_reason"]
+                if "content" not in choice["delta"]:
+                    continue
+                # Streamed chunks carry one decoded token each
+                completion_tokens += 1
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                delta = choice["delta"]["content"]
+                if not delta:
+                    continue
+                if not started:
+                    # Match the stripped output of a full completion
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                    started = True
+                yield delta
+        finally:
+            trace["completion_tokens"] = completion_tokens
+            if first_token_at is not None:
+                decode_seconds = time.perf_counter() - first_token_at
+                trace["ttft_ms"] = round((first_token_at - start) * 1000, 3)
+                if completion_tokens > 1 and decode_seconds > 0:
+                    trace["tokens_per_s"] = round((completion_tokens - 1) / decode_seconds, 2)
+
+
+def generate_rewrite(section_name, section_text, jd_text, outcome=None, keywords=None):
+    return "".join(
+        stream_rewrite(section_name, section_text, jd_text, outcome=outcome, keywords=keywords)
+    ).strip()
+
+
+# Context budgeting: split sections that would not fit next to the JD and the reply
+MAX_OUTPUT_TOKENS = 1024  # ceiling of the adaptive budget for one prompt
+PROMPT_OVERHEAD_TOKENS = 64  # chat template markers plus a safety margin
+MIN_CHUNK_TOKENS = 32
+
+_BULLET_LINE_RE = re.compile(r"^\s*(?:[-*\u2022\u25cf\u25aa]|\d{1,2}[.)])\s+")
+_ROLE_DATES_RE = re.compile(
+    r"\b(?:19|20)\d{2}\s*(?:[-\u2013\u2014]|to)\s*(?:(?:19|20)\d{2}|present|current|now)\b",
+    re.IGNORECASE,
+)
+
+
+def count_tokens(llm, text):
+    return len(llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+
+def section_token_budget(llm, section_name, jd_text, max_tokens=MAX_OUTPUT_TOKENS):
+    """How many tokens of section text fit in one prompt next to the JD and the reply
+
+    A chunk's reply is sized by output_budget, so the room left after the JD
+    is shared between the chunk and its own reply rather than max_tokens.
+    """
+    fixed = sum(
+        count_tokens(llm, message["content"])
+        for message in build_messages(section_name, "", jd_text)
+    )
+    room = llm.n_ctx() - fixed - PROMPT_OVERHEAD_TOKENS
+    ratio = output_ratio(section_name)
+    # chunk + chunk * ratio + slack, and at least MIN_OUTPUT_TOKENS of reply
+    fits = min(int((room - OUTPUT_SLACK_TOKENS) / (1 + ratio)), room - MIN_OUTPUT_TOKENS)
+    # A chunk must also be short enough for its output budget to fit under max_tokens
+    longest = int((max_tokens - OUTPUT_SLACK_TOKENS) / ratio)
+    if fits < MIN_CHUNK_TOKENS:
+        raise ValueError(
+            "The job description leaves no room for resume text in the model context; "
+            "shorten it or set jd_prompt_mode to digest"
+        )
+    return min(fits, longest)
+
+
+def _role_blocks(text):
+    """Split at blank lines and at non-bullet lines carrying a date range (a new role)"""
+    blocks, current = [], []
+    for line in text.split("\n"):
+        new_role = not line.strip() or (
+            _ROLE_DATES_RE.search(line) and not _BULLET_LINE_RE.match(line)
+        )
+        if new_role and any(existing.strip() for existing in current):
+            blocks.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+# Progressively finer split points: roles, lines/bullets, sentences, words
+_SPLIT_LEVELS = [
+    (_role_blocks, "\n"),
+    (lambda text: text.split("\n"), "\n"),
+    (lambda text: re.split(r"(?<=[.!?;])\s+", text), " "),
+    (lambda text: text.split(), " "),
+]
+
+
+def split_section(text, budget, count, level=0):
+    """Pack a section into chunks of at most `budget` tokens, splitting at the coarsest boundary that works"""
+    if count(text) <= budget or level >= len(_SPLIT_LEVELS):
+        return [text]
+
+    split, joiner = _SPLIT_LEVELS[level]
+    chunks, current, size = [], [], 0
+    for unit in split(text):
+        if not unit.strip():
+            if current:
+                current.append(unit)
+            continue
+        n = count(unit)
+        if n > budget:
+            if current:
+                chunks.append(joiner.join(current))
+                current, size = [], 0
+            chunks.extend(split_section(unit, budget, count, level + 1))
+            continue
+        if current and size + n > budget:
+            chunks.append(joiner.join(current))
+            current, size = [], 0
+        current.append(unit)
+        size += n
+    if current:
+        chunks.append(joiner.join(current))
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def plan_section_chunks(section_name, section_text, jd_text, max_tokens=MAX_OUTPUT_TOKENS):
+    """Chunks of a section that each fit the model context, in document order"""
+    with MODEL.session() as llm:
+        budget = section_token_budget(llm, section_name, jd_text, max_tokens)
+        return split_section(section_text, budget, lambda text: count_tokens(llm, text))
+
+
+def stream_section_rewrite(section_name, section_text, jd_text, outcomes=None, keywords=None):
+    """Like stream_rewrite, but rewrites oversized sections chunk by chunk and stitches them in order
+
+    If `outcomes` is a list, one stream_rewrite outcome per prompt is appended to it.
+    """
+    chunks = plan_section_chunks(section_name, section_text, jd_text)
+    for number, (label, chunk) in enumerate(label_chunks(section_name, chunks)):
+        if number:
+            yield "\n"
+        outcome = {}
+        if outcomes is not None:
+            outcomes.append(outcome)
+        yield from stream_rewrite(label, chunk, jd_text, outcome=outcome, keywords=keywords)
+
+
+TRUNCATED_MESSAGE = "The output budget ran out; this section may be cut short."
+
+
+def budget_hit(outcomes):
+    """True if any prompt of a section stopped at its output budget"""
+    return any(outcome.get("finish_reason") == "length" for outcome in outcomes)
+
+
+def label_chunks(section_name, chunks):
+    """Pair each chunk with the section label its prompt should use"""
+    if len(chunks) == 1:
+        return [(section_name, chunks[0])]
+    return [
+        (f"{section_name} (part {number} of {len(chunks)})", chunk)
+        for number, chunk in enumerate(chunks, start=1)
     ]
 
-    output = LLM.create_chat_completion(messages, max_tokens=500)
-    return output["choices"][0]["message"]["content"].strip()
 
+# Generator for token-level streaming
+def rewrite_sections_incremental(
+    resume_text, jd_text, use_cache=True, jd_mode=None, segments=None, keywords=None
+):
+    """Yield ("start" | "token" | "truncated" | "end" | "error", section, text) events while rewriting
 
-# Generator for streaming
-def rewrite_sections_streaming(resume_text, jd_text):
-    segments = segment_resume(resume_text)
+    "token" events carry newly decoded text; "end" carries the finished,
+    stripped section. Cached sections arrive as a single "token" event.
+    "truncated" comes just before "end" when the output budget ran out.
+    jd_mode picks "digest" or "full" JD prompts (default: jd_prompt_mode in config.yaml).
+    `segments` ({section: text}) skips segmentation of resume_text, and
+    `keywords` ({section: [keyword, ...]}) passes missing JD keywords to those
+    sections' prompts.
+    """
+    if segments is None:
+        segments = segment_resume(resume_text)
+    keywords = keywords or {}
     if not segments:
-        yield "Error", "Could not segment the resume. Use standard section headers like 'Experience', 'Skills', etc."
+        yield "error", "Error", "Could not segment the resume. Use standard section headers like 'Experience', 'Skills', etc."
         return
 
+    # Condense the JD once; every section prompt shares the same text
+    jd_text = prepare_jd(jd_text, jd_mode)
+
+    cache = get_rewrite_cache() if use_cache else None
     for section, content in segments.items():
         if not content.strip():
             continue
-        rewritten = generate_rewrite(section, content, jd_text)
-        yield section, rewritten
+        yield "start", section, ""
+        section_keywords = keywords.get(section)
+        if cache is not None:
+            key = rewrite_cache_key(section, content, jd_text, keywords=section_keywords)
+            rewritten = cache.get(key)
+            if rewritten is not None:
+                yield "token", section, rewritten
+                yield "end", section, rewritten
+                continue
+
+        pieces = []
+        outcomes = []
+        for delta in stream_section_rewrite(
+            section, content, jd_text, outcomes=outcomes, keywords=section_keywords
+        ):
+            pieces.append(delta)
+            yield "token", section, delta
+        rewritten = "".join(pieces).strip()
+        if budget_hit(outcomes):
+            # Not cached, so a retry with a larger budget is not served the cut-off text
+            yield "truncated", section, TRUNCATED_MESSAGE
+        elif cache is not None:
+            cache.put(key, rewritten)
+        yield "end", section, rewritten
+
+
+# Generator for streaming whole sections
+def rewrite_sections_streaming(resume_text, jd_text, use_cache=True, jd_mode=None):
+    for event, section, text in rewrite_sections_incremental(
+        resume_text, jd_text, use_cache=use_cache, jd_mode=jd_mode
+    ):
+        if event in ("end", "error"):
+            yield section, text
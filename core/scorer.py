@@ -1,258 +1,454 @@
+import math
 import re
-from fuzzywuzzy import fuzz
-from collections import Counter
+from collections import Counter, defaultdict
 import string
-from typing import Dict, List
+from typing import Dict, Iterable, List
+
+from core.config import load_config
+from core.sections import section_names
+from core.tracing import TRACER
+
+
+# Expanded common words list, built once at import time
+COMMON_WORDS = frozenset(
+    [
+        "the",
+        "and",
+        "with",
+        "for",
+        "you",
+        "are",
+        "this",
+        "that",
+        "have",
+        "will",
+        "your",
+        "our",
+        "from",
+        "work",
+        "company",
+        "team",
+        "their",
+        "they",
+        "would",
+        "should",
+        "which",
+        "when",
+        "what",
+        "where",
+        "how",
+        "about",
+        "been",
+        "also",
+        "such",
+        "than",
+        "them",
+        "those",
+        "then",
+        "just",
+        "like",
+        "other",
+        "more",
+        "some",
+        "only",
+        "into",
+        "over",
+        "most",
+        "make",
+        "many",
+        "even",
+        "after",
+        "before",
+        "while",
+        "because",
+        "being",
+        "under",
+        "through",
+        "during",
+        "without",
+        "could",
+        "might",
+        "must",
+        "shall",
+        "both",
+        "each",
+        "either",
+        "neither",
+        "whether",
+        "these",
+        "there",
+        "here",
+        "where",
+        "every",
+        "any",
+        "all",
+        "none",
+        "same",
+        "different",
+        "own",
+        "same",
+        "so",
+        "too",
+        "very",
+        "much",
+        "may",
+        "can",
+        "cannot",
+        "able",
+        "cannot",
+        "need",
+        "want",
+        "use",
+        "used",
+        "using",
+        "including",
+        "within",
+        "between",
+        "among",
+        "upon",
+        "based",
+        "according",
+        "including",
+        "etc",
+        "eg",
+        "ie",
+        "via",
+        "well",
+        "still",
+        "yet",
+        "already",
+        "never",
+        "always",
+        "often",
+        "sometimes",
+        "usually",
+        "generally",
+        "specifically",
+        "particularly",
+        "especially",
+        "mainly",
+        "primarily",
+        "essentially",
+        "basically",
+        "actually",
+        "literally",
+        "virtually",
+        "nearly",
+        "almost",
+        "quite",
+        "rather",
+        "somewhat",
+        "enough",
+        "sufficient",
+        "insufficient",
+        "adequate",
+        "inadequate",
+        "appropriate",
+        "inappropriate",
+        "relevant",
+        "irrelevant",
+        "important",
+        "unimportant",
+        "necessary",
+        "unnecessary",
+        "required",
+        "optional",
+        "available",
+        "unavailable",
+        "current",
+        "previous",
+        "former",
+        "latter",
+        "initial",
+        "final",
+        "next",
+        "last",
+        "recent",
+        "past",
+        "present",
+        "future",
+        "new",
+        "old",
+        "young",
+        "modern",
+        "ancient",
+        "recent",
+        "early",
+        "late",
+        "annual",
+        "monthly",
+        "weekly",
+        "daily",
+        "hourly",
+        "yearly",
+        "quarterly",
+        "biannual",
+        "biennial",
+        "centennial",
+    ]
+)
+
+
+# Precompiled tokenizer patterns. URL removal and special character removal
+# are fused into one pass; stripping has to happen before tokens are matched
+# because it joins fragments ("ci/cd" -> "cicd").
+_CLEAN_RE = re.compile(r"http\S+|www\S+|[^\w\s\+#]")
+_TOKEN_RE = re.compile(r"\b[\w#\+]{2,}\b")
 
 
 # Enhanced clean and tokenize function
 def tokenize(text: str) -> List[str]:
     """Tokenize text with more comprehensive cleaning"""
-    text = text.lower()
-    # Remove URLs
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text, flags=re.MULTILINE)
-    # Remove special characters but keep some meaningful symbols like '+' (for C++)
-    text = re.sub(r"[^\w\s\+#]", "", text)
+    # Remove URLs and special characters but keep some meaningful symbols like '+' (for C++)
+    text = _CLEAN_RE.sub("", text.lower())
     # Tokenize and remove single characters (except possibly meaningful ones like 'c')
-    tokens = re.findall(r"\b[\w#\+]{2,}\b", text)
-    return tokens
+    return _TOKEN_RE.findall(text)
+
+
+class TokenizedText:
+    """Tokens and token counts for one document, computed in a single tokenizer run"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.counts = Counter(self.tokens)
+        self.token_count = len(self.tokens)
+        self._sections = None
+        self._fuzzy_index = None
+        self._phrases = None
+
+    @property
+    def vocabulary(self):
+        return self.counts.keys()
+
+    @property
+    def sections(self) -> frozenset:
+        """Names of the sections whose headers appear in the text"""
+        if self._sections is None:
+            self._sections = frozenset(section_names(self.text))
+        return self._sections
+
+    @property
+    def fuzzy_index(self) -> "FuzzyIndex":
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyIndex(self.counts)
+        return self._fuzzy_index
+
+    @property
+    def phrases(self) -> frozenset:
+        """Adjacent token pairs and triples, for matching multi-word keyphrases"""
+        if self._phrases is None:
+            self._phrases = frozenset(_token_phrases(self.tokens))
+        return self._phrases
+
+
+def _token_phrases(tokens: List[str]) -> Iterable[str]:
+    for i in range(1, len(tokens)):
+        yield f"{tokens[i - 1]} {tokens[i]}"
+        if i >= 2:
+            yield f"{tokens[i - 2]} {tokens[i - 1]} {tokens[i]}"
+
+
+def has_keyword(resume, keyword: str) -> bool:
+    """True if a tokenized resume contains a JD keyword, single word or phrase"""
+    if " " in keyword:
+        return keyword in resume.phrases
+    return keyword in resume.counts
+
+
+def _keywords_from_counts(
+    counts: Counter, top_n: int = 30, min_word_length: int = 3
+) -> List[str]:
+    """Rank keywords from precomputed token counts"""
+    # Filter out common words, short words, and numbers. Counter keeps first
+    # occurrence order, so ties rank exactly as they would on the token list.
+    freq = Counter(
+        {
+            word: count
+            for word, count in counts.items()
+            if (
+                word not in COMMON_WORDS
+                and len(word) >= min_word_length
+                and not word.isdigit()
+            )
+        }
+    )
+    return [word for word, _ in freq.most_common(top_n)]
 
 
 # Enhanced keyword extraction
 def extract_keywords(text: str, top_n: int = 30, min_word_length: int = 3) -> List[str]:
     """Extract keywords with more sophisticated filtering"""
-    tokens = tokenize(text)
-
-    # Expanded common words list
-    common_words = set(
-        [
-            "the",
-            "and",
-            "with",
-            "for",
-            "you",
-            "are",
-            "this",
-            "that",
-            "have",
-            "will",
-            "your",
-            "our",
-            "from",
-            "work",
-            "company",
-            "team",
-            "their",
-            "they",
-            "would",
-            "should",
-            "which",
-            "when",
-            "what",
-            "where",
-            "how",
-            "about",
-            "been",
-            "also",
-            "such",
-            "than",
-            "them",
-            "those",
-            "then",
-            "just",
-            "like",
-            "other",
-            "more",
-            "some",
-            "only",
-            "into",
-            "over",
-            "most",
-            "make",
-            "many",
-            "even",
-            "after",
-            "before",
-            "while",
-            "because",
-            "being",
-            "under",
-            "through",
-            "during",
-            "without",
-            "could",
-            "might",
-            "must",
-            "shall",
-            "both",
-            "each",
-            "either",
-            "neither",
-            "whether",
-            "these",
-            "there",
-            "here",
-            "where",
-            "every",
-            "any",
-            "all",
-            "none",
-            "same",
-            "different",
-            "own",
-            "same",
-            "so",
-            "too",
-            "very",
-            "much",
-            "may",
-            "can",
-            "cannot",
-            "able",
-            "cannot",
-            "need",
-            "want",
-            "use",
-            "used",
-            "using",
-            "including",
-            "within",
-            "between",
-            "among",
-            "upon",
-            "based",
-            "according",
-            "including",
-            "etc",
-            "eg",
-            "ie",
-            "via",
-            "well",
-            "still",
-            "yet",
-            "already",
-            "never",
-            "always",
-            "often",
-            "sometimes",
-            "usually",
-            "generally",
-            "specifically",
-            "particularly",
-            "especially",
-            "mainly",
-            "primarily",
-            "essentially",
-            "basically",
-            "actually",
-            "literally",
-            "virtually",
-            "nearly",
-            "almost",
-            "quite",
-            "rather",
-            "somewhat",
-            "enough",
-            "sufficient",
-            "insufficient",
-            "adequate",
-            "inadequate",
-            "appropriate",
-            "inappropriate",
-            "relevant",
-            "irrelevant",
-            "important",
-            "unimportant",
-            "necessary",
-            "unnecessary",
-            "required",
-            "optional",
-            "available",
-            "unavailable",
-            "current",
-            "previous",
-            "former",
-            "latter",
-            "initial",
-            "final",
-            "next",
-            "last",
-            "recent",
-            "past",
-            "present",
-            "future",
-            "new",
-            "old",
-            "young",
-            "modern",
-            "ancient",
-            "recent",
-            "early",
-            "late",
-            "annual",
-            "monthly",
-            "weekly",
-            "daily",
-            "hourly",
-            "yearly",
-            "quarterly",
-            "biannual",
-            "biennial",
-            "centennial",
-        ]
-    )
+    return _keywords_from_counts(Counter(tokenize(text)), top_n, min_word_length)
 
-    # Filter out common words, short words, and numbers
-    keywords = [
-        word
-        for word in tokens
-        if (
-            word not in common_words
-            and len(word) >= min_word_length
-            and not word.isdigit()
-        )
-    ]
 
-    # Count frequency and get most common
-    freq = Counter(keywords)
+# Sections that count towards section_match
+SCORED_SECTIONS = ("experience", "education", "skills", "projects", "achievements")
 
-    # Filter out words that appear only once if we have enough keywords
-    if len(freq) > top_n * 1.5:  # Only filter if we have plenty of candidates
-        keywords = [word for word, count in freq.most_common() if count > 1]
+# How JD keywords are picked: "tokens" ranks single words by frequency,
+# "keyphrases" ranks uni/bi/trigrams by TF-IDF (see core.keyphrases)
+KEYWORD_MODES = ("tokens", "keyphrases")
 
-    return [word for word, _ in freq.most_common(top_n)]
 
+def default_keyword_mode() -> str:
+    return load_config().get("keyword_mode") or "tokens"
 
-# Enhanced keyword match score with partial matches
-def keyword_match(resume_text: str, jd_text: str) -> float:
-    """Calculate keyword match score with partial matching"""
-    resume_tokens = set(tokenize(resume_text))  # Using set for faster lookup
-    jd_keywords = extract_keywords(jd_text)
 
+class JDProfile:
+    """Job description data compiled once and reused for every resume scored against it"""
+
+    def __init__(
+        self, jd_text: str, top_n: int = 30, counts: Counter = None, keyword_mode: str = None
+    ):
+        keyword_mode = keyword_mode or default_keyword_mode()
+        if keyword_mode not in KEYWORD_MODES:
+            raise ValueError(f"Unknown keyword_mode {keyword_mode!r}, expected one of {KEYWORD_MODES}")
+        if counts is None:
+            counts = TokenizedText(jd_text).counts
+        self.jd_text = jd_text
+        self.keyword_mode = keyword_mode
+        if keyword_mode == "keyphrases":
+            from core.keyphrases import extract_keyphrases
+
+            self.keywords = extract_keyphrases(jd_text, top_n=top_n)
+        else:
+            self.keywords = _keywords_from_counts(counts, top_n=top_n)
+        self.keyword_set = frozenset(self.keywords)
+        self.tokens = frozenset(counts.keys())
+        self.scored_sections = SCORED_SECTIONS
+
+
+def build_jd_profile(jd_text: str, top_n: int = 30, keyword_mode: str = None) -> JDProfile:
+    """Compile a job description into a reusable JDProfile"""
+    return JDProfile(jd_text, top_n=top_n, keyword_mode=keyword_mode)
+
+
+# Fuzzy match threshold used for partial keyword credit
+PARTIAL_MATCH_THRESHOLD = 85
+
+
+def fuzz_ratio():
+    """fuzz.ratio, importing fuzzywuzzy and its Levenshtein backend on the first fuzzy lookup"""
+    from fuzzywuzzy import fuzz
+
+    return fuzz.ratio
+
+
+class FuzzyIndex:
+    """Length-bucketed index over a token vocabulary for thresholded fuzz.ratio lookups
+
+    fuzz.ratio is 2*M/T where M is at most the shorter length and at most the
+    number of characters the two strings share, so candidates are pruned on
+    length first and on character overlap second. Only survivors pay for the
+    exact ratio, which keeps results identical to a full scan.
+    """
+
+    def __init__(self, tokens: Iterable[str]):
+        self.tokens = set(tokens)
+        self._buckets: Dict[int, List[tuple]] = defaultdict(list)
+        for token in self.tokens:
+            self._buckets[len(token)].append((token, Counter(token)))
+
+    def _length_range(self, length: int, threshold: float) -> range:
+        # intr() rounds the ratio, so anything at or above threshold - 0.5 may still pass
+        bound = threshold - 0.5
+        if bound <= 0:
+            return range(1, max(self._buckets, default=0) + 1)
+        shortest = math.ceil(length * bound / (200 - bound))
+        longest = math.floor(length * (200 - bound) / bound)
+        return range(max(shortest, 1), longest + 1)
+
+    def has_match(self, query: str, threshold: float = PARTIAL_MATCH_THRESHOLD) -> bool:
+        """Return True if any indexed token reaches fuzz.ratio >= threshold"""
+        if not query:
+            return False
+        length = len(query)
+        query_counts = Counter(query).items()
+        bound = threshold - 0.5
+        ratio = fuzz_ratio()
+        # Visit lengths nearest the query first, where matches are most likely
+        lengths = sorted(
+            self._length_range(length, threshold), key=lambda n: abs(n - length)
+        )
+        for candidate_length in lengths:
+            bucket = self._buckets.get(candidate_length)
+            if not bucket:
+                continue
+            total = length + candidate_length
+            # Smallest shared character count that could still reach the threshold
+            needed = bound * total / 200
+            for token, counts in bucket:
+                overlap = length
+                for char, count in query_counts:
+                    missing = count - counts.get(char, 0)
+                    if missing > 0:
+                        overlap -= missing
+                        if overlap < needed:
+                            break
+                if overlap < needed:
+                    continue
+                if ratio(query, token) >= threshold:
+                    return True
+        return False
+
+
+class ScoringContext:
+    """Per-call scoring state shared by every metric
+
+    The resume is tokenized once and the JD is compiled once; metrics read
+    tokens, counts and the fuzzy index from here instead of re-tokenizing.
+    Anything with counts, token_count, sections and fuzzy_index (plus
+    phrases, for keyphrase profiles) can stand in for a TokenizedText (see
+    core.live).
+    """
+
+    def __init__(self, resume, profile):
+        if isinstance(resume, str):
+            resume = TokenizedText(resume)
+        if isinstance(profile, str):
+            profile = build_jd_profile(profile)
+        self.resume = resume
+        self.profile = profile
+
+
+def _keyword_match_score(ctx: ScoringContext) -> float:
+    """Keyword match score for a prepared scoring context"""
+    jd_keywords = ctx.profile.keywords
     if not jd_keywords:
         return 0.0
 
+    resume_tokens = ctx.resume.counts
+
     # Exact match score
-    exact_matched = sum(1 for kw in jd_keywords if kw in resume_tokens)
-    exact_score = (exact_matched / len(jd_keywords)) * 100
+    matched = [has_keyword(ctx.resume, kw) for kw in jd_keywords]
+    exact_matched = sum(matched)
 
     # Partial/fuzzy match score (for similar but not identical terms)
-    partial_match_threshold = 85  # Fuzzy match threshold
     partial_matches = 0
 
-    for jd_kw in jd_keywords:
-        if jd_kw in resume_tokens:
+    for jd_kw, found in zip(jd_keywords, matched):
+        if found:
             continue  # Already counted in exact matches
 
-        # Find best fuzzy match in resume
-        best_ratio = max(
-            [fuzz.ratio(jd_kw, resume_kw) for resume_kw in resume_tokens], default=0
-        )
+        if " " in jd_kw:
+            # A phrase whose words all appear, just not side by side
+            if all(word in resume_tokens for word in jd_kw.split()):
+                partial_matches += 0.5
+            continue
 
-        if best_ratio >= partial_match_threshold:
+        # Look for a close enough fuzzy match in resume
+        if ctx.resume.fuzzy_index.has_match(jd_kw, PARTIAL_MATCH_THRESHOLD):
             partial_matches += 0.5  # Partial match gets half credit
 
-    partial_score = (partial_matches / len(jd_keywords)) * 100
+    return _keyword_match_value(exact_matched, partial_matches, len(jd_keywords))
+
+
+def _keyword_match_value(exact_matched: int, partial_matches: float, keyword_count: int) -> float:
+    """Combine exact and partial keyword hits into the keyword match score"""
+    if not keyword_count:
+        return 0.0
+    exact_score = (exact_matched / keyword_count) * 100
+    partial_score = (partial_matches / keyword_count) * 100
 
     # Combine scores (70% exact, 30% partial)
     total_score = (exact_score * 0.7) + (partial_score * 0.3)
@@ -260,72 +456,93 @@ def keyword_match(resume_text: str, jd_text: str) -> float:
     return round(total_score, 2)
 
 
-# Enhanced section detection with pattern matching
-def section_match(resume_text: str) -> float:
-    """Detect resume sections with more sophisticated patterns"""
-    section_patterns = {
-        "experience": [
-            r"work\s*experience",
-            r"professional\s*experience",
-            r"employment\s*history",
-            r"\bexperience\b",
-        ],
-        "education": [
-            r"education",
-            r"academic\s*background",
-            r"degrees",
-            r"qualifications",
-            r"certifications",
-        ],
-        "skills": [
-            r"technical\s*skills",
-            r"key\s*skills",
-            r"core\s*competencies",
-            r"skills\s*summary",
-            r"\bskills\b",
-        ],
-        "projects": [
-            r"projects",
-            r"personal\s*projects",
-            r"academic\s*projects",
-            r"selected\s*projects",
-        ],
-        "achievements": [r"achievements", r"accomplishments", r"awards", r"honors"],
-    }
-
-    detected_sections = 0
-    resume_lower = resume_text.lower()
-
-    for section, patterns in section_patterns.items():
-        if any(re.search(pattern, resume_lower) for pattern in patterns):
-            detected_sections += 1
+def _section_percentage(detected: frozenset, scored_sections) -> float:
+    detected_sections = sum(1 for section in scored_sections if section in detected)
 
     # Calculate percentage based on total sections we're looking for
-    total_sections = len(section_patterns)
+    total_sections = len(scored_sections)
     return round((detected_sections / total_sections) * 100, 2)
 
 
+def _section_match_score(ctx: ScoringContext) -> float:
+    """Section match score for a prepared scoring context"""
+    return _section_percentage(ctx.resume.sections, ctx.profile.scored_sections)
+
+
+def _keyword_density_score(ctx: ScoringContext) -> float:
+    """Keyword density (percentage of JD keywords in resume) for a scoring context"""
+    total_resume_words = ctx.resume.token_count
+    jd_keywords = ctx.profile.keywords
+
+    if total_resume_words > 0 and jd_keywords:
+        matched_keywords = [kw for kw in jd_keywords if has_keyword(ctx.resume, kw)]
+        return _keyword_density_value(len(matched_keywords), total_resume_words)
+    return 0
+
+
+def _keyword_density_value(matched_keywords: int, total_resume_words: int) -> float:
+    keyword_density = (matched_keywords / total_resume_words) * 100
+    return round(min(keyword_density, 5), 2)  # Cap at 5%
+
+
+# Enhanced keyword match score with partial matches
+def keyword_match(resume_text: str, jd_text: str) -> float:
+    """Calculate keyword match score with partial matching"""
+    return _keyword_match_score(ScoringContext(resume_text, jd_text))
+
+
+# Enhanced section detection with pattern matching
+def section_match(resume_text: str) -> float:
+    """Detect resume sections from header lines (see core.sections)"""
+    return _section_percentage(frozenset(section_names(resume_text)), SCORED_SECTIONS)
+
+
+_METRICS = [
+    ("keyword_match", _keyword_match_score),
+    ("section_match", _section_match_score),
+    ("keyword_density", _keyword_density_score),
+]
+
+
+def score_context(ctx: ScoringContext) -> Dict[str, float]:
+    """Run every metric over one prepared scoring context"""
+    scores = {}
+    for name, metric in _METRICS:
+        with TRACER.span(f"score.{name}"):
+            scores[name] = metric(ctx)
+    scores["overall_score"] = 0  # Will be calculated
+    return scores
+
+
+def score_resume(resume_text: str, profile: JDProfile) -> Dict[str, float]:
+    """Calculate matching scores for one resume against a compiled JD profile"""
+    return score_context(ScoringContext(resume_text, profile))
+
+
 # Enhanced scoring with additional metrics
 def get_score(resume_text: str, jd_text: str) -> Dict[str, float]:
     """Calculate comprehensive matching scores"""
-    scores = {
-        "keyword_match": keyword_match(resume_text, jd_text),
-        "section_match": section_match(resume_text),
-        "keyword_density": 0,  # Will be calculated
-        "overall_score": 0,  # Will be calculated
-    }
-
-    # Calculate keyword density (percentage of JD keywords in resume)
-    jd_keywords = extract_keywords(jd_text)
-    resume_tokens = tokenize(resume_text)
-    total_resume_words = len(resume_tokens)
+    return score_context(ScoringContext(resume_text, jd_text))
 
-    if total_resume_words > 0 and jd_keywords:
-        matched_keywords = [kw for kw in jd_keywords if kw in resume_tokens]
-        keyword_density = (len(matched_keywords) / total_resume_words) * 100
-        scores["keyword_density"] = round(min(keyword_density, 5), 2)  # Cap at 5%
 
-    return scores
+def score_many(resumes: Iterable[str], profile: JDProfile) -> List[Dict[str, float]]:
+    """Score many resumes against one job description, compiling the JD only once"""
+    if not isinstance(profile, JDProfile):
+        profile = build_jd_profile(profile)
+    return [score_resume(resume_text, profile) for resume_text in resumes]
+
+
+def score_against_many(
+    resume_text: str, profiles: Iterable[JDProfile]
+) -> List[Dict[str, float]]:
+    """Score one resume against many job descriptions, tokenizing the resume only once"""
+    resume = TokenizedText(resume_text)
+    return [score_context(ScoringContext(resume, profile)) for profile in profiles]
+
+
+# Weights used when calculate_final_score is given none; core.semantic can add
+# its semantic_match metric on top of these
+DEFAULT_WEIGHTS = {"keyword_match": 0.6, "section_match": 0.2, "keyword_density": 0.2}
 
 
 # Enhanced final score calculation with more factors
@@ -334,7 +551,7 @@ def calculate_final_score(
 ) -> Dict[str, float]:
     """Calculate weighted final score with normalization"""
     if weights is None:
-        weights = {"keyword_match": 0.6, "section_match": 0.2, "keyword_density": 0.2}
+        weights = DEFAULT_WEIGHTS
 
     # Normalize weights to sum to 1
     total_weight = sum(weights.values())
@@ -0,0 +1,125 @@
+import re
+from collections import namedtuple
+from typing import List
+
+# Header keywords per section, most specific first
+SECTION_KEYWORDS = {
+    "summary": [
+        r"professional\s+summary",
+        r"career\s+objective",
+        r"about\s+me",
+        r"summary",
+        r"profile",
+        r"objective",
+    ],
+    "experience": [
+        r"work\s+experience",
+        r"professional\s+experience",
+        r"employment\s+history",
+        r"work\s+history",
+        r"career\s+history",
+        r"experience",
+        r"employment",
+    ],
+    "skills": [
+        r"technical\s+skills",
+        r"key\s+skills",
+        r"core\s+competencies",
+        r"skills",
+        r"competencies",
+        r"technologies",
+        r"tools",
+    ],
+    "education": [
+        r"academic\s+background",
+        r"education",
+        r"academics",
+        r"degrees",
+        r"qualifications",
+        r"certifications",
+    ],
+    "projects": [
+        r"personal\s+projects",
+        r"academic\s+projects",
+        r"selected\s+projects",
+        r"projects",
+        r"portfolio",
+        r"case\s+studies",
+    ],
+    "achievements": [r"achievements", r"accomplishments", r"awards", r"honors"],
+}
+
+SectionSpan = namedtuple("SectionSpan", ["name", "start", "end", "header"])
+
+# Words that may sit next to a header keyword ("Relevant Experience",
+# "Education & Training"); job titles such as "Portfolio Manager" or
+# "Senior Tools Engineer" hold other words and stay body text
+HEADER_QUALIFIERS = [
+    r"&", r"and", r"/", r"of",
+    r"work", r"professional", r"technical", r"key", r"core", r"relevant", r"selected",
+    r"additional", r"other", r"related", r"career", r"academic", r"personal",
+    r"leadership", r"volunteer", r"research", r"teaching", r"industry",
+    r"programming", r"computer", r"software", r"languages", r"training", r"licenses",
+    r"interests", r"highlights", r"history", r"activities", r"courses", r"coursework",
+]
+
+_H = r"[^\S\n]"  # horizontal whitespace
+_WORD = r"[A-Za-z&/]+"
+_KEYWORDS = "|".join(
+    rf"(?P<{name}>{'|'.join(patterns)})" for name, patterns in SECTION_KEYWORDS.items()
+)
+# A qualifier or another section keyword ("Skills & Tools", "Honors & Awards")
+_HEADER_WORD = "(?:{})".format(
+    "|".join(HEADER_QUALIFIERS + [p for patterns in SECTION_KEYWORDS.values() for p in patterns])
+)
+# Inline "Skills: Python, SQL" headers only use the canonical names; lines such
+# as "Tools: Kafka" or "Technologies: React" are details inside a job entry
+_INLINE_KEYWORDS = "|".join(rf"(?P<inline_{name}>{name})" for name in SECTION_KEYWORDS)
+
+# One pass over the document. A header is a line holding a section keyword and
+# at most two qualifiers on each side ("Professional Experience", "Education & Training"),
+# optionally wrapped in markdown marks or ending in a colon, or an unbulleted
+# "Skills: Python, SQL" line. Bullets and sentences never start a section.
+HEADER_RE = re.compile(
+    rf"^{_H}*(?:"
+    rf"[#*=|>]*{_H}*(?:{_HEADER_WORD}{_H}+){{0,2}}?\b(?:{_KEYWORDS})\b"
+    rf"(?:{_H}+{_HEADER_WORD}){{0,2}}{_H}*[:*#=|\-]*{_H}*$"
+    rf"|(?:{_WORD}{_H}+){{0,2}}?(?:{_INLINE_KEYWORDS})\b{_H}*:.*$"
+    rf")",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _section_name(match):
+    for key, value in match.groupdict().items():
+        if value is not None:
+            return key[len("inline_"):] if key.startswith("inline_") else key
+    return None
+
+
+def detect_sections(text: str) -> List[SectionSpan]:
+    """Find section headers in one scan; each span runs to the next header
+
+    Offsets index into `text`. A section may appear more than once (e.g. two
+    separate experience blocks); callers decide how to merge repeats.
+    """
+    headers = [
+        (_section_name(match), match.start(), match.group().strip())
+        for match in HEADER_RE.finditer(text)
+    ]
+    spans = []
+    for i, (name, start, header) in enumerate(headers):
+        end = headers[i + 1][1] if i + 1 < len(headers) else len(text)
+        spans.append(SectionSpan(name, start, end, header))
+    return spans
+
+
+def section_names(text: str) -> List[str]:
+    """Distinct section names in document order"""
+    return list(dict.fromkeys(span.name for span in detect_sections(text)))
+
+
+def header_name(line: str):
+    """Section name if this single line is a section header, else None"""
+    match = HEADER_RE.match(line)
+    return _section_name(match) if match else None
@@ -0,0 +1,242 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from core import scorer
+from core.cache import content_hash
+from core.config import load_config
+from core.tracing import TRACER
+
+SEMANTIC_METRIC = "semantic_match"
+DEFAULT_SEMANTIC_MODEL = "en_core_web_md"
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CACHE_SIZE = 4096  # documents whose vector rows are remembered
+
+# Only the tokenizer and the static vector table are needed
+EXCLUDED_PIPES = [
+    "tok2vec",
+    "tagger",
+    "morphologizer",
+    "parser",
+    "senter",
+    "attribute_ruler",
+    "lemmatizer",
+    "ner",
+    "entity_ruler",
+    "textcat",
+    "transformer",
+]
+
+
+def semantic_weight() -> float:
+    """Weight of the semantic metric in the final score; 0 leaves it out"""
+    return float(load_config().get("semantic_weight") or 0)
+
+
+def score_weights(weight: float) -> Dict[str, float]:
+    """Default final score weights with the semantic metric added"""
+    return {**scorer.DEFAULT_WEIGHTS, SEMANTIC_METRIC: weight}
+
+
+class SemanticScorer:
+    """Scores how close a resume's wording is to the JD keywords using word vectors
+
+    For every JD keyword with a vector, the best cosine similarity against
+    the resume's content words is taken, so "kubernetes" still earns credit
+    from "container" or "orchestration". The score is the mean over those
+    keywords, scaled to 0-100.
+
+    The spaCy pipeline is loaded on first use with every component except
+    the tokenizer excluded. A document is reduced to the unique rows of the
+    vector table its words map to, which is all that is cached (a few KB per
+    resume); keyword rows are cached by keyword, so a JD's vectors are looked
+    up once however many resumes are scored against it.
+    """
+
+    def __init__(
+        self,
+        model: str = None,
+        batch_size: int = None,
+        n_process: int = None,
+        cache_size: int = None,
+        nlp=None,
+    ):
+        self._model = model
+        self._batch_size = batch_size
+        self._n_process = n_process
+        self._cache_size = cache_size
+        self._nlp = nlp
+        self._norms = None
+        self._lock = threading.RLock()
+        self._doc_rows = OrderedDict()
+        self._keyword_rows: Dict[str, int] = {}
+
+    @property
+    def model(self) -> str:
+        return self._model or load_config().get("semantic_model", DEFAULT_SEMANTIC_MODEL)
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or load_config().get("semantic_batch_size", DEFAULT_BATCH_SIZE)
+
+    @property
+    def n_process(self) -> int:
+        return self._n_process or load_config().get("semantic_workers") or 1
+
+    @property
+    def cache_size(self) -> int:
+        if self._cache_size is not None:
+            return self._cache_size
+        return load_config().get("semantic_cache_size", DEFAULT_CACHE_SIZE)
+
+    @property
+    def nlp(self):
+        with self._lock:
+            if self._nlp is None:
+                self._nlp = self._load()
+            return self._nlp
+
+    def check_model(self):
+        """Raise RuntimeError early if spaCy or the configured model is missing"""
+        try:
+            import spacy.util
+        except ImportError:
+            raise RuntimeError("Semantic scoring needs spaCy: pip install spacy") from None
+        if not (spacy.util.is_package(self.model) or os.path.isdir(self.model)):
+            raise RuntimeError(
+                f"spaCy model '{self.model}' is not installed; run "
+                f"'python -m spacy download {self.model}' or set semantic_model"
+            )
+
+    def _load(self):
+        self.check_model()
+        import spacy
+
+        with TRACER.span("semantic.load", model=self.model):
+            nlp = spacy.load(self.model, exclude=EXCLUDED_PIPES)
+        if nlp.vocab.vectors.mode != "default" or not nlp.vocab.vectors.shape[0]:
+            raise RuntimeError(
+                f"spaCy model '{self.model}' has no static word vectors; "
+                "use a pipeline such as en_core_web_md or en_core_web_lg"
+            )
+        return nlp
+
+    @property
+    def _table(self):
+        """(vector rows, row norms), the norms computed once per loaded model"""
+        vectors = self.nlp.vocab.vectors
+        if self._norms is None:
+            import numpy
+
+            norms = numpy.linalg.norm(vectors.data, axis=1)
+            norms[norms == 0] = 1
+            self._norms = norms
+        return vectors.data, self._norms
+
+    def _rows_for(self, doc):
+        import numpy
+
+        words = {
+            token.lower_
+            for token in doc
+            if not (token.is_stop or token.is_punct or token.is_space or token.like_num)
+        }
+        if not words:
+            return numpy.empty(0, dtype=numpy.int32)
+        rows = self.nlp.vocab.vectors.find(keys=list(words))
+        return numpy.unique(rows[rows >= 0]).astype(numpy.int32)
+
+    def document_rows(self, texts: List[str]) -> List:
+        """Vector rows for each text; uncached texts go through one batched nlp.pipe"""
+        with self._lock:
+            keys = [content_hash(text) for text in texts]
+            rows = [self._doc_rows.get(key) for key in keys]
+            missing = {}
+            for key, text, found in zip(keys, texts, rows):
+                if found is None:
+                    missing.setdefault(key, text)
+            if missing:
+                with TRACER.span("semantic.pipe", docs=len(missing)):
+                    docs = self.nlp.pipe(
+                        missing.values(),
+                        batch_size=self.batch_size,
+                        # Worker processes only pay off on large batches
+                        n_process=self.n_process if len(missing) > self.batch_size else 1,
+                    )
+                    computed = dict(zip(missing, (self._rows_for(doc) for doc in docs)))
+            else:
+                computed = {}
+            for i, key in enumerate(keys):
+                if rows[i] is None:
+                    rows[i] = computed[key]
+                    self._doc_rows[key] = rows[i]
+                else:
+                    self._doc_rows.move_to_end(key)
+            while len(self._doc_rows) > self.cache_size:
+                self._doc_rows.popitem(last=False)
+            return rows
+
+    def keyword_rows(self, keywords: Iterable[str]):
+        """Vector rows for JD keywords; keywords without a vector are dropped"""
+        import numpy
+
+        with self._lock:
+            missing = [kw for kw in keywords if kw not in self._keyword_rows]
+            if missing:
+                found = self.nlp.vocab.vectors.find(keys=missing)
+                self._keyword_rows.update(zip(missing, (int(row) for row in found)))
+            rows = [self._keyword_rows[kw] for kw in keywords]
+        return numpy.array([row for row in rows if row >= 0], dtype=numpy.int32)
+
+    def _similarity(self, keyword_matrix, doc_rows) -> float:
+        if not len(keyword_matrix) or not len(doc_rows):
+            return 0.0
+        data, norms = self._table
+        doc_matrix = data[doc_rows] / norms[doc_rows, None]
+        best = (keyword_matrix @ doc_matrix.T).max(axis=1).clip(min=0)
+        return round(float(best.mean()) * 100, 2)
+
+    def _keyword_matrix(self, jd):
+        profile = jd if isinstance(jd, scorer.JDProfile) else scorer.build_jd_profile(jd)
+        # Vectors are per word, so keyphrases are matched through their words
+        words = dict.fromkeys(word for keyword in profile.keywords for word in keyword.split())
+        rows = self.keyword_rows(list(words))
+        data, norms = self._table
+        return data[rows] / norms[rows, None]
+
+    def similarity(self, resume_text: str, jd) -> float:
+        """Semantic match of one resume against a JD text or JDProfile"""
+        return self.similarity_many([resume_text], jd)[0]
+
+    def similarity_many(self, resumes: List[str], jd) -> List[float]:
+        """Score many resumes against one JD, embedding its keywords once"""
+        with TRACER.span("score." + SEMANTIC_METRIC, docs=len(resumes)):
+            keyword_matrix = self._keyword_matrix(jd)
+            return [
+                self._similarity(keyword_matrix, rows)
+                for rows in self.document_rows(resumes)
+            ]
+
+    def similarity_against_many(self, resume_text: str, profiles: Iterable) -> List[float]:
+        """Score one resume against many JDs, processing the resume only once"""
+        with TRACER.span("score." + SEMANTIC_METRIC):
+            rows = self.document_rows([resume_text])[0]
+            return [
+                self._similarity(self._keyword_matrix(profile), rows)
+                for profile in profiles
+            ]
+
+
+# Shared instance, loaded on first use
+SEMANTIC = SemanticScorer()
+
+
+def final_scores(raw_scores: Dict[str, float], resume_text: str, jd, weight: float = None):
+    """calculate_final_score, adding the semantic metric when it carries weight"""
+    if weight is None:
+        weight = semantic_weight()
+    if not weight:
+        return scorer.calculate_final_score(raw_scores)
+    raw_scores[SEMANTIC_METRIC] = SEMANTIC.similarity(resume_text, jd)
+    return scorer.calculate_final_score(raw_scores, score_weights(weight))
@@ -0,0 +1,268 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from core.config import load_config
+
+DEFAULT_BUFFER_SIZE = 2000  # recent spans kept in memory for summaries
+# Histogram bounds in seconds, from a single metric to a whole rewrite
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+METRIC_PREFIX = "resume_optimizer"
+
+
+class Tracer:
+    """Records timed spans for each pipeline stage (parse, segment, rewrite, score)
+
+    Every span is a flat dict: name, start timestamp, duration and whatever
+    attributes the stage attached (token counts, cache outcome, ...). Recent
+    spans stay in a ring buffer for summaries and JSON lines export; running
+    histograms feed the Prometheus text export. With trace_path set in
+    config.yaml every span is also appended to that file as it finishes.
+    """
+
+    def __init__(self, enabled: bool = None, buffer_size: int = None, path: str = None):
+        self._enabled = enabled
+        self._buffer_size = buffer_size
+        self._path = path
+        self._spans = None
+        self._sink = None
+        self._seq = 0
+        self._histograms = {}
+        self._token_totals = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = bool(load_config().get("trace_enabled", True))
+        return self._enabled
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = load_config().get("trace_path") or ""
+        return self._path
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the block as one span; the yielded dict collects extra attributes"""
+        if not self.enabled:
+            yield attrs
+            return
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except GeneratorExit:
+            # A streaming consumer stopped early (e.g. a cancelled rewrite)
+            attrs["cancelled"] = True
+            raise
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, started_at, **attrs)
+
+    def record(self, name: str, seconds: float, started_at: float = None, **attrs):
+        """Record a span measured elsewhere"""
+        if not self.enabled:
+            return
+        span = {
+            "name": name,
+            "ts": round(started_at if started_at is not None else time.time() - seconds, 6),
+            "duration_ms": round(seconds * 1000, 3),
+            "pid": os.getpid(),
+            **attrs,
+        }
+        self._add(span)
+
+    def absorb(self, spans: Iterable[dict]):
+        """Add spans recorded in another process (pool workers ship theirs back)"""
+        for span in spans:
+            self._add(dict(span))
+
+    def _add(self, span):
+        with self._lock:
+            if self._spans is None:
+                size = self._buffer_size or load_config().get(
+                    "trace_buffer_size", DEFAULT_BUFFER_SIZE
+                )
+                self._spans = deque(maxlen=size)
+            self._seq += 1
+            span["seq"] = self._seq
+            self._spans.append(span)
+            self._observe(span)
+            if self.path:
+                self._write(span)
+
+    def _observe(self, span):
+        name = span["name"]
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = [[0] * len(DURATION_BUCKETS), 0, 0.0]
+        seconds = span["duration_ms"] / 1000
+        bucket = bisect.bisect_left(DURATION_BUCKETS, seconds)
+        if bucket < len(DURATION_BUCKETS):
+            histogram[0][bucket] += 1
+        histogram[1] += 1
+        histogram[2] += seconds
+        for key, value in span.items():
+            if key.endswith("_tokens") and isinstance(value, int):
+                kind = key[: -len("_tokens")]
+                self._token_totals[(name, kind)] = self._token_totals.get((name, kind), 0) + value
+
+    def _write(self, span):
+        if self._sink is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Append mode: one short write per line keeps concurrent processes from interleaving
+            self._sink = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._sink.write(json.dumps(span) + "\n")
+
+    def mark(self) -> int:
+        """Position in the span stream; pass it to spans(since=...) to get what came after"""
+        with self._lock:
+            return self._seq
+
+    def spans(self, since: int = 0, name: str = None) -> List[dict]:
+        """Buffered spans, oldest first"""
+        with self._lock:
+            spans = list(self._spans or ())
+        return [
+            span
+            for span in spans
+            if span["seq"] > since and (name is None or span["name"] == name)
+        ]
+
+    def drain(self) -> List[dict]:
+        """Return and forget the buffered spans"""
+        with self._lock:
+            spans = list(self._spans or ())
+            if self._spans is not None:
+                self._spans.clear()
+        return spans
+
+    def clear(self):
+        with self._lock:
+            self._spans = None
+            self._histograms = {}
+            self._token_totals = {}
+
+    def export_jsonl(self, out, spans: List[dict] = None):
+        """Write spans (default: the buffer) as JSON lines to a path or an open file"""
+        spans = self.spans() if spans is None else spans
+        if isinstance(out, str):
+            with open(out, "w", encoding="utf-8") as f:
+                return self.export_jsonl(f, spans)
+        for span in spans:
+            out.write(json.dumps(span) + "\n")
+        return len(spans)
+
+    def prometheus_text(self) -> str:
+        """Stage histograms and token counters in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {
+                name: (list(buckets), count, total)
+                for name, (buckets, count, total) in self._histograms.items()
+            }
+            token_totals = dict(self._token_totals)
+
+        metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in each pipeline stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name in sorted(histograms):
+            buckets, count, total = histograms[name]
+            cumulative = 0
+            for bound, hits in zip(DURATION_BUCKETS, buckets):
+                cumulative += hits
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+
+        if token_totals:
+            metric = f"{METRIC_PREFIX}_llm_tokens_total"
+            lines.append(f"# HELP {metric} Tokens evaluated or generated by the model.")
+            lines.append(f"# TYPE {metric} counter")
+            for (name, kind), total in sorted(token_totals.items()):
+                lines.append(f'{metric}{{stage="{name}",kind="{kind}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(spans: List[dict]) -> List[Dict[str, float]]:
+    """Per-stage count, total/mean/p95 time and LLM throughput, slowest stage first"""
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span["name"], []).append(span)
+
+    rows = []
+    for name, group in by_name.items():
+        durations = sorted(span["duration_ms"] for span in group)
+        row = {
+            "stage": name,
+            "count": len(group),
+            "total_ms": round(sum(durations), 3),
+            "mean_ms": round(sum(durations) / len(durations), 3),
+            "p95_ms": round(_percentile(durations, 0.95), 3),
+        }
+        for key in ("prompt_tokens", "completion_tokens"):
+            values = [span[key] for span in group if key in span]
+            if values:
+                row[key] = sum(values)
+        for key in ("ttft_ms", "tokens_per_s"):
+            values = [span[key] for span in group if span.get(key) is not None]
+            if values:
+                row[key] = round(sum(values) / len(values), 2)
+        rows.append(row)
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def format_summary(spans: List[dict]) -> str:
+    """Plain-text table of summarize(), plus the slowest LLM calls by section"""
+    rows = summarize(spans)
+    if not rows:
+        return "No timings recorded."
+    lines = [f"{'Stage':28s} {'Calls':>5s} {'Total ms':>10s} {'Mean ms':>9s} {'p95 ms':>9s}"]
+    for row in rows:
+        lines.append(
+            f"{row['stage']:28s} {row['count']:5d} {row['total_ms']:10.1f} "
+            f"{row['mean_ms']:9.1f} {row['p95_ms']:9.1f}"
+        )
+        if "completion_tokens" in row:
+            lines.append(
+                f"{'':28s} prompt {row.get('prompt_tokens', 0)} tok, "
+                f"completion {row['completion_tokens']} tok, "
+                f"TTFT {row.get('ttft_ms', 0):.0f} ms, {row.get('tokens_per_s', 0):.1f} tok/s"
+            )
+
+    calls = sorted(
+        (span for span in spans if "section" in span),
+        key=lambda span: span["duration_ms"],
+        reverse=True,
+    )
+    if calls:
+        lines.append("")
+        lines.append("Slowest sections:")
+        for span in calls[:5]:
+            lines.append(
+                f"  {span['section']:40s} {span['duration_ms']:9.1f} ms "
+                f"({span.get('completion_tokens', 0)} tok)"
+            )
+    return "\n".join(lines)
+
+
+# Shared tracer; spans are only buffered once something records one
+TRACER = Tracer()
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from core import scorer, semantic
+from core.optimizer import optimize_sections
+from core.pool import rewrite_sections_parallel
+from core.tracing import TRACER
+
+MAX_BODY_BYTES = 5 * 1024 * 1024
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    504: "Gateway Timeout",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Runs in the scoring processes; a portal usually scores many resumes per posting
+@lru_cache(maxsize=64)
+def _profile_for(jd_text):
+    return scorer.build_jd_profile(jd_text)
+
+
+def _score(resume_text, jd_text):
+    profile = _profile_for(jd_text)
+    raw_scores = scorer.score_resume(resume_text, profile)
+    final_scores = semantic.final_scores(raw_scores, resume_text, profile)
+    # Hand the metric spans back so /metrics covers work done in the pool
+    return final_scores, TRACER.drain()
+
+
+class OptimizerService:
+    """Headless HTTP front end for scoring and rewriting
+
+    Scoring runs in a process pool so the event loop never does CPU work.
+    Rewrites share `inference_slots` model threads; up to `queue_size` more
+    wait their turn and anything beyond that is rejected with 429 so a burst
+    cannot pile unbounded work onto the model. Work counts as in flight until
+    it has actually stopped, not just until its request gave up waiting.
+    One model instance generates one rewrite at a time, so slots beyond one
+    only overlap when llm_pool_workers runs several model processes.
+    """
+
+    def __init__(
+        self,
+        score_workers=None,
+        inference_slots=1,
+        queue_size=8,
+        score_timeout=30.0,
+        rewrite_timeout=600.0,
+    ):
+        self.score_workers = score_workers or os.cpu_count() or 1
+        self.inference_slots = inference_slots
+        self.queue_size = queue_size
+        self.score_timeout = score_timeout
+        self.rewrite_timeout = rewrite_timeout
+        # spawn: forking a process that already runs inference threads is unsafe
+        self._score_pool = ProcessPoolExecutor(
+            max_workers=self.score_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._inference = ThreadPoolExecutor(
+            max_workers=inference_slots, thread_name_prefix="inference"
+        )
+        self._scores_in_flight = 0
+        self._rewrites_in_flight = 0
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, body = await self._read_request(reader)
+            if path == "/health" and method == "GET":
+                await self._send_json(writer, 200, self.stats())
+            elif path == "/metrics" and method == "GET":
+                await self._send_text(writer, 200, TRACER.prometheus_text())
+            elif path == "/score":
+                self._require_post(method)
+                await self.score(writer, self._parse_payload(body))
+            elif path == "/rewrite":
+                self._require_post(method)
+                await self.rewrite(writer, self._parse_payload(body))
+            else:
+                raise HTTPError(404, f"No route for {path}")
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await self._send_json(writer, 500, {"error": str(e)})
+        finally:
+            writer.close()
+
+    def stats(self):
+        return {
+            "status": "ok",
+            "scores_in_flight": self._scores_in_flight,
+            "rewrites_in_flight": self._rewrites_in_flight,
+            "rewrite_capacity": self.inference_slots + self.queue_size,
+        }
+
+    async def score(self, writer, payload):
+        if self._scores_in_flight >= self.score_workers * 4:
+            raise HTTPError(429, "Scoring is saturated, retry shortly")
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._score_pool, _score, payload["resume"], payload["jd"])
+        self._scores_in_flight += 1
+        job.add_done_callback(self._score_finished)
+        try:
+            # shield: a timeout must not mark the job done while a worker still runs it
+            scores, spans = await asyncio.wait_for(asyncio.shield(job), self.score_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(504, "Scoring timed out")
+        TRACER.absorb(spans)
+        await self._send_json(writer, 200, scores)
+
+    def _score_finished(self, job):
+        self._scores_in_flight -= 1
+        if not job.cancelled():
+            job.exception()  # retrieved, so an abandoned failure is not logged as unhandled
+
+    def _rewrite_finished(self, job):
+        self._rewrites_in_flight -= 1
+        if not job.cancelled():
+            job.exception()
+
+    async def rewrite(self, writer, payload):
+        if self._rewrites_in_flight >= self.inference_slots + self.queue_size:
+            raise HTTPError(429, "Rewrite queue is full, retry shortly")
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        cancel = threading.Event()
+
+        def produce():
+            try:
+                if cancel.is_set():
+                    return  # timed out or disconnected while still queued
+                if payload.get("optimize"):
+                    stream = optimize_sections(
+                        payload["resume"],
+                        payload["jd"],
+                        max_rounds=payload.get("max_rounds"),
+                        jd_mode=payload.get("jd_mode"),
+                    )
+                else:
+                    stream = rewrite_sections_parallel(
+                        payload["resume"], payload["jd"], jd_mode=payload.get("jd_mode")
+                    )
+                try:
+                    for event in stream:
+                        if cancel.is_set():
+                            break
+                        loop.call_soon_threadsafe(events.put_nowait, event)
+                finally:
+                    # Stops decoding and frees the model now rather than when collected
+                    stream.close()
+            except Exception as e:
+                loop.call_soon_threadsafe(events.put_nowait, ("error", "Error", str(e)))
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        job = loop.run_in_executor(self._inference, produce)
+        # Counted until produce returns, which may be after this request times out
+        self._rewrites_in_flight += 1
+        job.add_done_callback(self._rewrite_finished)
+        try:
+            await self._start_stream(writer)
+            deadline = loop.time() + self.rewrite_timeout
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        events.get(), max(deadline - loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    await self._send_chunk(
+                        writer, {"event": "error", "text": "Rewrite timed out"}
+                    )
+                    break
+                if item is None:
+                    break
+                event, section, text = item
+                await self._send_chunk(
+                    writer, {"event": event, "section": section, "text": text}
+                )
+            await self._end_stream(writer)
+        finally:
+            # Stops token generation if the client left or the deadline passed
+            cancel.set()
+
+    @staticmethod
+    def _require_post(method):
+        if method != "POST":
+            raise HTTPError(405, "Use POST")
+
+    @staticmethod
+    def _parse_payload(body):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        for field in ("resume", "jd"):
+            if not isinstance(payload.get(field), str) or not payload[field].strip():
+                raise HTTPError(400, f"Missing '{field}' text")
+        return payload
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], body
+
+    @staticmethod
+    async def _send_json(writer, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _send_text(writer, status, text):
+        body = text.encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _start_stream(writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _send_chunk(writer, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    @staticmethod
+    async def _end_stream(writer):
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def close(self):
+        self._score_pool.shutdown(wait=False, cancel_futures=True)
+        self._inference.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host, port, service):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Resume optimizer service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM Resume Optimizer HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--score-workers", type=int, default=None)
+    parser.add_argument(
+        "--inference-slots",
+        type=int,
+        default=1,
+        help="Rewrites run at once; above 1 only helps with llm_pool_workers model processes",
+    )
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--score-timeout", type=float, default=30.0)
+    parser.add_argument("--rewrite-timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    service = OptimizerService(
+        score_workers=args.score_workers,
+        inference_slots=args.inference_slots,
+        queue_size=args.queue_size,
+        score_timeout=args.score_timeout,
+        rewrite_timeout=args.rewrite_timeout,
+    )
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,13 @@
+from cli import top_k_per_jd
+
+
+def _rows(order):
+    scores = {"a.pdf": 50.0, "b.pdf": 50.0, "c.pdf": 50.0, "d.pdf": 80.0}
+    return [{"resume": name, "jd": "jd.txt", "overall_score": scores[name]} for name in order]
+
+
+def test_ties_break_on_resume_name_whatever_the_arrival_order():
+    expected = [("d.pdf", 1), ("a.pdf", 2), ("b.pdf", 3)]
+    for order in (["a.pdf", "b.pdf", "c.pdf", "d.pdf"], ["c.pdf", "d.pdf", "b.pdf", "a.pdf"]):
+        ranked = [(row["resume"], row["rank"]) for row in top_k_per_jd(iter(_rows(order)), 3)]
+        assert ranked == expected
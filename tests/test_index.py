@@ -0,0 +1,59 @@
+import random
+
+from benchmarks.corpus import make_jd, make_resume
+from core import scorer
+from core.index import ResumeIndex
+
+
+def _full_scan(docs, jd, k):
+    rows = [
+        {"resume": doc_id, **scorer.calculate_final_score(scorer.get_score(text, jd))}
+        for doc_id, text in docs.items()
+    ]
+    return sorted(rows, key=lambda row: (-row["overall_score"], row["resume"]))[:k]
+
+
+def test_top_k_equals_a_full_scan(tmp_path):
+    rng = random.Random(3)
+    docs = {}
+    for i in range(120):
+        text = make_resume(rng, rng.randint(1, 3), rng.randint(2, 5))
+        if rng.random() < 0.3:
+            text += "\npythn kubernets reactjs"  # partial matches only
+        docs[f"r{i:03d}"] = text
+    index = ResumeIndex(str(tmp_path / "resumes.sqlite"))
+    index.add_many(docs.items())
+    try:
+        for jd in [make_jd(rng, rng.randint(4, 15)) for _ in range(3)] + ["knitting"]:
+            assert index.top_k(jd, 10) == _full_scan(docs, jd, 10)
+    finally:
+        index.close()
+
+
+def test_ties_without_keyword_hits_break_on_doc_id(tmp_path):
+    docs = {name: "Education\nBSc\nSkills\nknitting" for name in ("a.txt", "m.txt", "z.txt")}
+    index = ResumeIndex(str(tmp_path / "resumes.sqlite"))
+    # Inserted in an order that differs from the tie order
+    for name in ("m.txt", "z.txt", "a.txt"):
+        index.add(name, docs[name])
+    try:
+        jd = "Backend engineer: Python, Kafka"
+        assert [row["resume"] for row in index.top_k(jd, 2)] == ["a.txt", "m.txt"]
+        assert index.top_k(jd, 2) == _full_scan(docs, jd, 2)
+    finally:
+        index.close()
+
+
+def test_index_from_an_older_version_is_rebuilt(tmp_path):
+    path = str(tmp_path / "resumes.sqlite")
+    index = ResumeIndex(path)
+    index.add("a.txt", "Experience\nPython")
+    index._conn.execute("UPDATE meta SET value = '1' WHERE key = 'version'")
+    index._conn.commit()
+    index.close()
+    index = ResumeIndex(path)
+    try:
+        assert index.stats()["resumes"] == 0
+        assert index.add("a.txt", "Experience\nPython")
+    finally:
+        index.close()
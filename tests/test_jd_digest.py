@@ -0,0 +1,65 @@
+from core.rewriter import build_jd_digest, detect_seniority, strip_boilerplate
+
+JD = """Senior Machine Learning Engineer
+
+About us
+We are a fast-growing insurtech with a mission to make claims painless.
+
+Requirements:
+- 5+ years of experience training computer vision models in PyTorch.
+- Strong knowledge of concurrency; able to debug race conditions in Python services.
+- Experience with insurance claims and compensation analytics is a plus.
+
+Benefits
+- Medical, dental and vision insurance
+- Generous PTO and parental leave
+
+Equal Opportunity
+We are an equal opportunity employer and do not discriminate on the basis of race, religion or gender.
+"""
+
+
+def test_digest_keeps_requirements_that_share_words_with_boilerplate():
+    digest = build_jd_digest(JD)
+    assert "computer vision models" in digest
+    assert "race conditions" in digest
+    assert "insurance claims and compensation analytics" in digest
+
+
+def test_digest_drops_boilerplate_blocks():
+    digest = build_jd_digest(JD)
+    assert "dental" not in digest.lower()
+    assert "equal opportunity" not in digest.lower()
+    assert "painless" not in digest
+    key_terms = digest.split("Key terms: ", 1)[1].split("\n", 1)[0].split(", ")
+    assert "dental" not in key_terms and "discriminate" not in key_terms
+
+
+def test_semicolons_do_not_split_sentences():
+    digest = build_jd_digest(JD)
+    assert "- Strong knowledge of concurrency; able to debug race conditions in Python services." in digest
+
+
+def test_boilerplate_block_ends_at_next_heading():
+    text = "Benefits\n- Free lunch\nResponsibilities\n- Ship the billing service"
+    assert strip_boilerplate(text) == "Responsibilities\n- Ship the billing service"
+
+
+def test_plain_lines_inside_a_boilerplate_block_do_not_end_it():
+    text = "Perks\nDental\nGym\nAbout you\nYou ship Python services"
+    assert strip_boilerplate(text) == "About you\nYou ship Python services"
+
+
+def test_seniority_comes_from_the_title():
+    jd = "Junior Data Analyst\nYou will report to the analytics manager and lead weekly reviews.\n- 1+ years of SQL."
+    assert detect_seniority(jd) == "Junior (1+ years)"
+
+
+def test_body_wording_is_not_read_as_a_level():
+    jd = "Data Engineer\nLead the migration to Spark and support our staff.\nReport to the engineering manager."
+    assert detect_seniority(jd) == ""
+
+
+def test_body_level_is_used_when_the_title_has_none():
+    jd = "Backend Engineer\nWe are hiring a senior engineer to own billing.\n- 5+ years of Go."
+    assert detect_seniority(jd) == "Senior (5+ years)"
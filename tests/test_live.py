@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from benchmarks.corpus import make_pair
+from core import scorer
+from core.live import LiveScorer
+
+RESUME_EDITS = ["x", " python", "pythn", "Skills", "", "kubernete"]
+INSERTED_LINES = ["Education", "Achievements:", "- led sql work", "", "Experience", "dockr terraform"]
+JD_EDITS = ["Need graphql and rust", "kafka kafka kafka", "Senior ops"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_live_scores_equal_full_scoring_after_every_edit(seed):
+    rng = random.Random(seed)
+    resume, jd = make_pair("small", seed)
+    live = LiveScorer()
+    assert live.update(resume, jd) == scorer.get_score(resume, jd)
+    lines = resume.split("\n")
+    for _ in range(60):
+        op = rng.random()
+        i = rng.randrange(len(lines))
+        if op < 0.3:
+            lines[i] = lines[i][: rng.randrange(len(lines[i]) + 1)] + rng.choice(RESUME_EDITS)
+        elif op < 0.5:
+            lines.insert(i, rng.choice(INSERTED_LINES))
+        elif op < 0.6 and len(lines) > 3:
+            del lines[i]
+        elif op < 0.7:
+            jd += "\n" + rng.choice(JD_EDITS)
+        else:
+            lines[i] += " " + rng.choice(scorer.extract_keywords(jd))
+        text = "\n".join(lines)
+        assert live.update(text, jd) == scorer.get_score(text, jd)
@@ -0,0 +1,88 @@
+from benchmarks.fake_llm import FakeLlama, use_fake_llm
+from core import optimizer
+
+JD = (
+    "Backend engineer. Python, Kafka and PostgreSQL services on Kubernetes.\n"
+    "Python APIs, Kafka streaming, PostgreSQL tuning, Kubernetes deployments with Terraform."
+)
+RESUME = (
+    "Summary\nBackend engineer building Python services.\n\n"
+    "Experience\nAcme Corp 2019 - 2023\n- Built Kafka streaming APIs in Python\n"
+    "- Ran PostgreSQL tuning and Kubernetes deployments\n\n"
+    "Skills\nPython, Kafka, PostgreSQL, Kubernetes, Terraform"
+)
+
+
+class RecordingLlama(FakeLlama):
+    """Echoes every section and records the instruction of each prompt"""
+
+    instructions = []
+
+    def _reply(self, messages, max_tokens, stop):
+        RecordingLlama.instructions.append(messages[-1]["content"])
+        return super()._reply(messages, max_tokens, stop)
+
+
+class DropSkillsLlama(RecordingLlama):
+    """Like RecordingLlama, except that the first skills rewrite loses its keywords"""
+
+    dropped = False
+
+    def _reply(self, messages, max_tokens, stop):
+        words = super()._reply(messages, max_tokens, stop)
+        if "Terraform" in messages[-2]["content"] and not DropSkillsLlama.dropped:
+            DropSkillsLlama.dropped = True
+            return ["Skills", "Various", "tools."]
+        return words
+
+
+def _run(**fake):
+    with use_fake_llm(**fake) as manager:
+        events = list(optimizer.optimize_sections(RESUME, JD, use_cache=False, max_rounds=3))
+    return events, manager
+
+
+def test_keyword_coverage_reaches_one():
+    # keyword_match tops out at 70; coverage of the JD itself is the whole scale
+    keywords = ["python", "kafka", "postgresql"]
+    assert optimizer.keyword_coverage("Python and Kafka on PostgreSQL", keywords) == 1.0
+    assert optimizer.keyword_coverage("Python only", keywords) == 1 / 3
+    assert optimizer.keyword_coverage("anything", []) == 1.0
+
+
+def test_resume_meeting_target_stops_after_first_round():
+    events, _ = _run()
+    assert not [e for e in events if e[0] == "round"]
+    rewritten = [section for event, section, _ in events if event == "end"]
+    assert rewritten == ["summary", "experience", "skills"]
+    assert [section for event, section, _ in events if event == "final"] == rewritten
+
+
+def _run_with(llama, monkeypatch, resume=RESUME, **options):
+    monkeypatch.setattr(RecordingLlama, "instructions", [])
+    with use_fake_llm() as manager:
+        manager._load = llama
+        return list(optimizer.optimize_sections(resume, JD, use_cache=False, **options))
+
+
+def test_dropped_keywords_are_named_first_in_the_retry(monkeypatch):
+    monkeypatch.setattr(DropSkillsLlama, "dropped", False)
+    events = _run_with(DropSkillsLlama, monkeypatch, threshold=1.0, max_rounds=2)
+    retried = [text for event, _, text in events if event == "round"][0].split(", ")
+    assert "skills" in retried
+    hints = [i.split("keywords: ", 1)[1] for i in RecordingLlama.instructions[3:] if "keywords: " in i]
+    # The skills retry: what the section lost, then what the whole resume misses
+    assert "python, kafka, postgresql, kubernetes, terraform." in hints
+
+
+def test_resume_below_target_retries_its_weakest_sections(monkeypatch):
+    # Every section keeps what it had, but the resume as a whole misses most keywords
+    resume = "Summary\nBackend engineer.\n\nExperience\nAcme Corp\n- Built Python APIs\n\nEducation\nBSc"
+    events = _run_with(RecordingLlama, monkeypatch, resume=resume, max_rounds=2)
+    rounds = [text for event, _, text in events if event == "round"]
+    assert rounds == ["summary, education"]
+    # Section scores are shares of every JD keyword, so none claims the target alone
+    first_scores = [float(text) for event, _, text in events if event == "score"][:3]
+    assert all(score < 75 for score in first_scores)
+    retries = RecordingLlama.instructions[3:]
+    assert retries and all("kafka" in instruction for instruction in retries)
@@ -0,0 +1,69 @@
+import random
+import threading
+import time
+
+from benchmarks.corpus import make_jd
+from benchmarks.fake_llm import FakeLlama, FakeModelManager
+from core.rewriter import (
+    PROMPT_OVERHEAD_TOKENS,
+    build_messages,
+    count_tokens,
+    output_budget,
+    prepare_jd,
+    section_token_budget,
+    split_section,
+    stop_sequences,
+)
+
+
+def test_sessions_on_one_model_never_overlap():
+    manager = FakeModelManager()
+    active = []
+    overlaps = []
+
+    def generate():
+        with manager.session():
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.02)
+            active.pop()
+
+    threads = [threading.Thread(target=generate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [1, 1, 1, 1]
+
+
+def _cut(text, section_name):
+    """Text as the model would return it with the section's stop sequences"""
+    for stop in stop_sequences(section_name):
+        if stop in text:
+            text = text[: text.index(stop)]
+    return text
+
+
+def test_first_person_summary_lines_are_not_cut():
+    summary = "Summary\nBackend engineer.\nI have led teams of five.\nI've shipped payments at scale."
+    assert _cut(summary, "summary") == summary
+
+
+def test_notes_after_the_section_are_cut():
+    section = "Summary\nBackend engineer."
+    for note in ("\nNote: I added keywords.", "\nI hope this helps!", "\n\nI've made these changes:"):
+        assert _cut(section + note, "summary") == section
+
+
+def test_chunks_and_their_replies_fit_a_small_context():
+    llm = FakeLlama(n_ctx=1200)
+    jd_text = prepare_jd(make_jd(random.Random(1)), "digest")
+    section = "\n".join(f"- Shipped service {n} in Python with Kafka and PostgreSQL" for n in range(150))
+    budget = section_token_budget(llm, "experience", jd_text)
+    fixed = sum(
+        count_tokens(llm, message["content"]) for message in build_messages("experience", "", jd_text)
+    )
+    for chunk in split_section(section, budget, lambda text: count_tokens(llm, text)):
+        tokens = count_tokens(llm, chunk)
+        used = fixed + tokens + output_budget(tokens, "experience") + PROMPT_OVERHEAD_TOKENS
+        assert used <= llm.n_ctx()
@@ -0,0 +1,36 @@
+import random
+import string
+
+from fuzzywuzzy import fuzz
+
+from benchmarks.corpus import SKILLS
+from core.scorer import PARTIAL_MATCH_THRESHOLD, FuzzyIndex
+
+
+def _mutate(rng, word):
+    """A word with one random edit, often still close enough for a fuzzy match"""
+    i = rng.randrange(len(word) + 1)
+    edit = rng.choice(["insert", "delete", "replace"])
+    if edit == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if edit == "delete" and len(word) > 2:
+        return word[:i] + word[i + 1 :]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1 :]
+
+
+def test_fuzzy_index_agrees_with_a_full_ratio_scan():
+    rng = random.Random(7)
+    vocabulary = set(SKILLS)
+    vocabulary.update(_mutate(rng, rng.choice(SKILLS)) for _ in range(200))
+    vocabulary.update(
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 14)))
+        for _ in range(200)
+    )
+    index = FuzzyIndex(vocabulary)
+    queries = SKILLS + [_mutate(rng, rng.choice(SKILLS)) for _ in range(200)] + ["", "x"]
+    for threshold in (PARTIAL_MATCH_THRESHOLD, 60, 95, 100):
+        for query in queries:
+            expected = bool(query) and any(
+                fuzz.ratio(query, token) >= threshold for token in vocabulary
+            )
+            assert index.has_match(query, threshold) == expected, (query, threshold)
@@ -0,0 +1,43 @@
+from core.rewriter import segment_resume
+from core.scorer import section_match
+from core.sections import header_name, section_names
+
+RESUME = (
+    "Experience\n"
+    "Acme Corp, Backend Engineer 2019 - 2023\n"
+    "Tools: Python, Kafka\n"
+    "Technologies: React, Node\n"
+    "- Built the billing service\n"
+    "- Cut latency by 40%\n\n"
+    "Education\n"
+    "BSc Computer Science"
+)
+
+
+def test_inline_tool_lines_stay_in_their_job_entry():
+    sections = segment_resume(RESUME)
+    assert list(sections) == ["experience", "education"]
+    assert "Tools: Python, Kafka" in sections["experience"]
+    assert "Cut latency by 40%" in sections["experience"]
+
+
+def test_inline_tool_lines_earn_no_section_credit():
+    assert section_names(RESUME) == ["experience", "education"]
+    assert section_match(RESUME) == 40.0
+
+
+def test_inline_headers_use_canonical_names():
+    assert header_name("Skills: Python, SQL") == "skills"
+    assert header_name("Technical Skills: Python") == "skills"
+    assert header_name("Tools: Python, Kafka") is None
+    assert header_name("Technologies: React, Node") is None
+    # Stand-alone header lines still accept every keyword
+    assert header_name("Tools & Technologies") == "skills"
+
+
+def test_job_titles_holding_a_keyword_are_not_headers():
+    for title in ["Senior Tools Engineer", "Education Technology Specialist", "Portfolio Manager", "Experience Designer"]:
+        assert header_name(title) is None
+    assert header_name("Relevant Experience") == "experience"
+    assert header_name("Education & Training") == "education"
+    assert header_name("Summary of Qualifications") == "summary"
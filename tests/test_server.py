@@ -0,0 +1,73 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import server
+
+PAYLOAD = {"resume": "Experience\nBuilt things", "jd": "Backend engineer"}
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+def test_timed_out_rewrite_counts_until_its_work_stops(monkeypatch):
+    def slow_rewrite(*args, **kwargs):
+        time.sleep(0.3)
+        yield "start", "experience", ""
+
+    monkeypatch.setattr(server, "rewrite_sections_parallel", slow_rewrite)
+    service = server.OptimizerService(score_workers=1, rewrite_timeout=0.05)
+
+    async def run():
+        await service.rewrite(FakeWriter(), dict(PAYLOAD))
+        # The request gave up, but the model thread is still busy
+        assert service._rewrites_in_flight == 1
+        assert await _wait_for(lambda: service._rewrites_in_flight == 0)
+
+    try:
+        asyncio.run(run())
+    finally:
+        service.close()
+
+
+def test_timed_out_score_counts_until_its_work_stops(monkeypatch):
+    def slow_score(resume, jd):
+        time.sleep(0.3)
+        return {}, []
+
+    monkeypatch.setattr(server, "_score", slow_score)
+    service = server.OptimizerService(score_workers=1, score_timeout=0.05)
+    service._score_pool.shutdown()
+    service._score_pool = ThreadPoolExecutor(max_workers=1)
+
+    async def run():
+        with pytest.raises(server.HTTPError) as raised:
+            await service.score(FakeWriter(), dict(PAYLOAD))
+        assert raised.value.status == 504
+        assert service._scores_in_flight == 1
+        assert await _wait_for(lambda: service._scores_in_flight == 0)
+
+    try:
+        asyncio.run(run())
+    finally:
+        service.close()
@@ -0,0 +1,32 @@
+import tkinter as tk
+
+from app.tasks import TaskRunner
+
+
+class FakeRoot:
+    """The two Tk root methods TaskRunner uses, without a display"""
+
+    def __init__(self):
+        self.reported = []
+
+    def after(self, ms, func):
+        pass
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        self.reported.append(exc_type)
+
+
+def test_callback_errors_are_reported_not_swallowed():
+    root = FakeRoot()
+    runner = TaskRunner(root, workers=1)
+
+    def destroyed_widget():
+        raise tk.TclError('invalid command name ".!text"')
+
+    def bug():
+        raise KeyError("missing")
+
+    runner._call(destroyed_widget)
+    runner._call(bug)
+    assert root.reported == [KeyError]
+    runner.shutdown()